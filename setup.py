@@ -14,6 +14,9 @@ setuptools.setup(
     url="https://github.com/xuthus/pyslurpers",
     packages=['pyslurpers'],
     package_dir={'pyslurpers': 'src'},
+    entry_points={
+        'console_scripts': ['slurpers=pyslurpers.slurpers:main']
+    },
     license="MIT License",
     keywords="pyslurpers xml json config cfg ini parse processing",
     platforms=["any"],
@@ -43,5 +46,5 @@ setuptools.setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.4',
+    python_requires='>=3.7',
 )
@@ -1 +1,5 @@
-from .slurpers import XmlSlurper, JsonSlurper, ConfigSlurper, Constants
+from .slurpers import XmlSlurper, JsonSlurper, ConfigSlurper, Constants, MaterializedNode, materialize, NameCache, \
+    slurp_many, SlurpResult, SlurpCache, Selector, compile_selector, \
+    ConfigWatcher, XmlBackend, JsonBackend, register_backend, get_backend, available_backends, ColumnarList, \
+    TypeSchema, compile_types, infer_type, to_bool, SlurpIndex, Profiler, SharedDocument, \
+    Projection, compile_projection, LayeredConfig
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for slurpers: build time, field access latency and peak memory.\n
+Run from the `src` directory: `python benchmarks.py [--scale N] [--output results.json] [--compare baseline.json]`
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+
+from slurpers import XmlSlurper, JsonSlurper, ConfigSlurper
+
+
+def generate_wide_xml(records: int):
+    """Xml document with many repeated `item` records of several fields"""
+    parts = ['<catalog>']
+    for i in range(records):
+        parts.append('<item id="{0}"><item-name>Item {0}</item-name><unit.price>{1}</unit.price>'
+                     '<qty>{2}</qty><category><name>cat{3}</name><code>{3}</code></category></item>'
+                     .format(i, i * 1.5, i % 10, i % 7))
+    parts.append('</catalog>')
+    return ''.join(parts)
+
+
+def generate_deep_xml(depth: int, width: int = 3):
+    """Xml document with nested `level` tags, each level has `width` leaf fields"""
+    parts = ['<root>']
+    for i in range(depth):
+        parts.append('<level>' + ''.join('<field-{0}>{1}</field-{0}>'.format(j, i) for j in range(width)))
+    parts.append('<leaf>bottom</leaf>')
+    parts.append('</level>' * depth)
+    parts.append('</root>')
+    return ''.join(parts)
+
+
+def generate_json(records: int):
+    """Json document with large array of objects"""
+    return json.dumps({
+        'name': 'events',
+        'events': [{'id': i, 'event-type': 'click' if i % 2 else 'view', 'value': i * 0.5,
+                    'tags': ['a', 'b'], 'user': {'user-id': i % 100, 'country': 'RU'}} for i in range(records)]
+    })
+
+
+def generate_config(sections: int, options: int = 10):
+    """Config document with many sections of several options"""
+    parts = ['[DEFAULT]\ndomain: example.com\n']
+    for i in range(sections):
+        parts.append('[Section {}]\n'.format(i))
+        parts.extend('option-{}: value {} at %(domain)s\n'.format(j, j) for j in range(options))
+    return '\n'.join(parts)
+
+
+def _best(func, number: int, repeat: int):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def _memory(func):
+    """Returns peak memory during the call, memory retained by its result, and the result"""
+    tracemalloc.start()
+    try:
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+        return peak, current, result
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_case(name: str, create, data: str, access, accesses: int, repeat: int = 3):
+    """Measures build time, throughput, access latency and peak memory for single document"""
+    build_seconds = _best(lambda: create(data), 1, repeat)
+    peak_memory, retained_memory, slurper = _memory(lambda: create(data))
+    access_seconds = _best(lambda: access(slurper), 10000, repeat)
+    size = len(data.encode('utf-8'))
+    return {
+        'document_bytes': size,
+        'build_seconds': build_seconds,
+        'build_mb_per_second': size / build_seconds / 1024 / 1024,
+        'access_ns': access_seconds / accesses * 1e9,
+        'peak_memory_bytes': peak_memory,
+        'retained_memory_bytes': retained_memory
+    }
+
+
+def cases(scale: int):
+    """Returns benchmark cases: name, create function, document, access function and number of accesses in it"""
+    wide_xml = generate_wide_xml(2000 * scale)
+    deep_xml = generate_deep_xml(min(50 * scale, 500))
+    json_doc = generate_json(2000 * scale)
+    config = generate_config(100 * scale)
+    return [
+        ('xml wide', lambda d: XmlSlurper.create(d), wide_xml, lambda s: s.item[10].category.code, 4),
+        ('xml wide lazy', lambda d: XmlSlurper.create(d, lazy=True), wide_xml,
+         lambda s: s.item[10].category.code, 4),
+        ('xml wide materialized', lambda d: XmlSlurper.create(d, materialize=True), wide_xml,
+         lambda s: s.item[10].category.code, 4),
+        ('xml wide compact', lambda d: XmlSlurper.create(d, compact=True), wide_xml,
+         lambda s: s.item[10].category.code, 4),
+        ('xml deep', lambda d: XmlSlurper.create(d), deep_xml, lambda s: s.level.level.level.field_0, 4),
+        ('json array', lambda d: JsonSlurper.create(d), json_doc, lambda s: s.events[10].user.user_id, 4),
+        ('json array compact', lambda d: JsonSlurper.create(d, compact=True), json_doc,
+         lambda s: s.events[10].user.user_id, 4),
+        ('config', lambda d: ConfigSlurper.create(d), config, lambda s: s.Section_10.option_5, 2),
+    ]
+
+
+def bench_access(number: int = 100000):
+    """Measures field access rate (accesses per second) on slurped documents"""
+    xml = XmlSlurper.create(file_name='testdata/beatles.xml')
+    json_doc = JsonSlurper.create(file_name='testdata/baez.json')
+    materialized = XmlSlurper.create(file_name='testdata/beatles.xml', materialize=True)
+    cases = [
+        ('xml top-level field', lambda: xml.man, 1),
+        ('xml nested chain', lambda: xml.man[1].born.year, 4),
+        ('json nested chain', lambda: json_doc.albums[4].number_of_tracks, 3),
+        ('materialized chain', lambda: materialized.man[1].born.year, 4),
+    ]
+    results = {}
+    for name, func, accesses in cases:
+        seconds = min(timeit.repeat(func, number=number, repeat=3))
+        results[name] = accesses * number / seconds
+    return results
+
+
+def run(scale: int = 1, repeat: int = 3, selected=None):
+    """Runs benchmark suite, returns machine-readable results"""
+    results = {}
+    for name, create, data, access, accesses in cases(scale):
+        if not selected or any(s in name for s in selected):
+            results[name] = benchmark_case(name, create, data, access, accesses, repeat)
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'scale': scale,
+        'results': results
+    }
+
+
+def compare(current: dict, baseline: dict):
+    """Returns report lines comparing two runs: ratio of current to baseline values (lower is better)"""
+    lines = []
+    for name, metrics in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        for metric in ('build_seconds', 'access_ns', 'peak_memory_bytes', 'retained_memory_bytes'):
+            lines.append('{:<24} {:<18} {:>8.2f}x'.format(name, metric, metrics[metric] / base[metric]))
+    return lines
+
+
+def _print(report: dict):
+    print('{:<24} {:>10} {:>12} {:>10} {:>12}'.format('case', 'size, KB', 'build, ms', 'MB/s', 'access, ns')
+          + ' {:>12} {:>12}'.format('peak, KB', 'retained, KB'))
+    for name, m in report['results'].items():
+        print('{:<24} {:>10.0f} {:>12.2f} {:>10.2f} {:>12.0f} {:>12.0f} {:>12.0f}'.format(
+            name, m['document_bytes'] / 1024, m['build_seconds'] * 1000, m['build_mb_per_second'], m['access_ns'],
+            m['peak_memory_bytes'] / 1024, m['retained_memory_bytes'] / 1024))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Slurpers benchmark suite')
+    parser.add_argument('--scale', type=int, default=1, help='document size multiplier')
+    parser.add_argument('--repeat', type=int, default=3, help='number of repetitions, the best one is reported')
+    parser.add_argument('--case', action='append', help='run only cases whose names contain this string')
+    parser.add_argument('--output', help='write results to json file')
+    parser.add_argument('--compare', help='compare results with previously written json file')
+    parser.add_argument('--access', action='store_true', help='run field access micro-benchmark only')
+    args = parser.parse_args(argv)
+    if args.access:
+        for case, rate in bench_access().items():
+            print('{:<20} {:>12,.0f} accesses/s'.format(case, rate))
+        return
+    report = run(args.scale, args.repeat, args.case)
+    _print(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print('\n'.join(compare(report, json.load(f))))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
 # -*- coding: utf-8 -*-
 
 import _io
-import configparser
+import codecs
+import io
 import json
+import os
 import re
+import struct
+import sys
+import threading
+import time
 from abc import ABCMeta, abstractmethod
+from array import array
+from collections import namedtuple
+from collections.abc import Sequence
 from xml.etree import ElementTree
 
 
@@ -30,66 +39,1604 @@ def strip_namespace(s: str):
 
 
 def strip_illegal_chars_capitalize(s: str, illegal_chars: tuple = ('-', '.')):
-    res = ''
+    res = []
     cap = False
     for c in s:
         if c in illegal_chars:
             cap = True
         else:
-            res = res + (c.upper() if cap else c)
+            res.append(c.upper() if cap else c)
             cap = False
-    return res
+    return ''.join(res)
+
+
+_mask_patterns = {}
+
+
+def _compile_mask(illegal_chars_mask: str):
+    pattern = _mask_patterns.get(illegal_chars_mask)
+    if pattern is None:
+        pattern = _mask_patterns[illegal_chars_mask] = re.compile(illegal_chars_mask)
+    return pattern
 
 
 def replace_illegal_chars_with(s: str, ch: str, illegal_chars_mask: str = '[-.]'):
-    return re.sub(illegal_chars_mask, ch, s)
+    return _compile_mask(illegal_chars_mask).sub(ch, s)
+
+
+def strip_illegal_chars(s: str, illegal_chars_mask: str = '[-.]'):
+    return replace_illegal_chars_with(s, '', illegal_chars_mask)
+
+
+class ColumnarList(Sequence):
+    """
+    Compact column-wise storage for repeated elements with the same fields (see `create(compact=True)`).\n
+    Field names are stored once, values are stored per column: in `array` buffers for numeric columns
+    and in lists for other ones. Items are read as dictionaries: `xml.item[0].price`; whole columns are
+    returned by `column()`: `xml.item.column('price')`.
+    """
+    __slots__ = ('keys', 'columns', '_length')
+
+    def __init__(self, keys: tuple, columns: list, length: int):
+        self.keys = keys
+        self.columns = columns
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        return dict(zip(self.keys, [column[index] for column in self.columns]))
+
+    def column(self, name: str):
+        try:
+            return self.columns[self.keys.index(name)]
+        except ValueError:
+            raise KeyError(name)
+
+    def __eq__(self, other):
+        if isinstance(other, (ColumnarList, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+def _compact_column(values: list):
+    if all(type(value) is int for value in values):
+        try:
+            return array('q', values)
+        except OverflowError:
+            return values
+    if all(type(value) is float for value in values):
+        return array('d', values)
+    return values
+
+
+def _compact(value):
+    """Replaces lists of dictionaries with the same keys by `ColumnarList` objects"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, _CONTAINER_TYPES):
+                value[key] = _compact(item)
+    elif isinstance(value, list) and value:
+        for i, item in enumerate(value):
+            if isinstance(item, _CONTAINER_TYPES):
+                value[i] = _compact(item)
+        first = value[0]
+        if len(value) > 1 and isinstance(first, dict):
+            keys = tuple(first)
+            if all(isinstance(item, dict) and len(item) == len(keys) and tuple(item) == keys for item in value):
+                return ColumnarList(keys, [_compact_column([item[key] for item in value]) for key in keys],
+                                    len(value))
+    return value
+
+
+def _plain(value):
+    """Returns copy of the document with plain dicts and lists only"""
+    if isinstance(value, dict):
+        return {key: _plain(item) if isinstance(item, _CONTAINER_TYPES) else item for key, item in value.items()}
+    if isinstance(value, (list, ColumnarList)):
+        return [_plain(item) if isinstance(item, _CONTAINER_TYPES) else item for item in value]
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, ColumnarList):
+        return list(value)
+    if isinstance(value, array):
+        return value.tolist()
+    raise TypeError('Object of type {} is not JSON serializable'.format(type(value).__name__))
+
+
+def _write_json(value, write, encode, depth: int):
+    """Writes json text of the document, containers of the first `depth` levels are written item by item"""
+    if depth and isinstance(value, dict):
+        write('{')
+        separator = ''
+        for key, item in value.items():
+            write(separator)
+            write(encode(key if isinstance(key, str) else str(key)))
+            write(': ')
+            _write_json(item, write, encode, depth - 1)
+            separator = ', '
+        write('}')
+    elif depth and isinstance(value, (list, ColumnarList)):
+        write('[')
+        separator = ''
+        for item in value:
+            write(separator)
+            _write_json(item, write, encode, depth - 1)
+            separator = ', '
+        write(']')
+    else:
+        write(encode(value))
+
+
+_object_getattribute = object.__getattribute__
+_object_setattr = object.__setattr__
+_CONTAINER_TYPES = (list, dict, ColumnarList)
+_BUFFER_TYPES = (bytes, bytearray, memoryview)
+_STREAM_TYPES = (_io._TextIOBase, _io._BufferedIOBase, _io._RawIOBase)
+_MISSING = object()
+
+
+class AbstractSlurper(metaclass=ABCMeta):
+    __slots__ = ('_value', '_illegal_chars_action', '_children')
+
+    def __init__(self, value):
+        self._value = value
+        self._illegal_chars_action = Constants.REPLACE_WITH_UNDERSCORES
+        self._children = None
+
+    def __len__(self):
+        return len(_object_getattribute(self, '_value'))
+
+    def __getattribute__(self, key: str):
+        # document fields are looked up first, without raising and catching an exception for each access
+        local_value = _object_getattribute(self, '_value')
+        if isinstance(local_value, dict):
+            result = local_value.get(key, _MISSING)
+            if result is not _MISSING:
+                if isinstance(result, _CONTAINER_TYPES):
+                    return _child_wrapper(self, key, result)
+                return result
+        try:
+            return _object_getattribute(self, key)
+        except AttributeError:
+            pass
+        if isinstance(local_value, _CONTAINER_TYPES):
+            raise KeyError(key)
+        return local_value  # or raise KeyError(key)??
+
+    def __getitem__(self, key: str):
+        local_value = _object_getattribute(self, '_value')
+        if isinstance(local_value, _CONTAINER_TYPES):
+            result = local_value[key]
+            if isinstance(result, _CONTAINER_TYPES):
+                if isinstance(key, slice):
+                    return XmlSlurper(result)
+                return _child_wrapper(self, key, result)
+            return result
+        return local_value
+
+    @classmethod
+    async def acreate(cls, data=None, file_name: str = None, executor=None, chunk_size: int = 65536, **options):
+        """
+        Create python object in asyncio application without blocking the event loop.\n
+        Asyncio stream (e.g. `asyncio.StreamReader`) given as `data` is read chunk by chunk, CPU-heavy parsing and
+        conversion are done in the executor.
+
+        **data** (optional) - source accepted by `create()`, or asyncio stream\n
+        **file_name** (optional) - file name for the document\n
+        **executor** (optional) - `concurrent.futures` executor, default executor of the event loop is used if not set\n
+        **chunk_size** (default: `65536`) - number of bytes read from asyncio stream at once\n
+        **options** - other `create()` arguments
+        """
+        import asyncio
+        import functools
+        if _is_async_stream(data):
+            data = await cls._aread(data, chunk_size, options)
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(cls.create, data, file_name, **options))
+
+    @classmethod
+    async def _aread(cls, reader, chunk_size: int, options: dict):
+        """Reads asyncio stream, returns data accepted by `create()`"""
+        chunks = bytearray()
+        async for chunk in _aread_chunks(reader, chunk_size):
+            chunks += chunk
+        return bytes(chunks)
+
+    def column(self, name: str):
+        """Returns list of `name` field values of all items: `xml.item.column('price')`"""
+        local_value = _object_getattribute(self, '_value')
+        if isinstance(local_value, ColumnarList):
+            return local_value.column(name)
+        return [item[name] for item in _as_list(local_value)]
+
+    def select(self, expression: str, wrap: bool = True):
+        """
+        Returns list of values matching the path expression, e.g. `xml.select('man[*].born.year')`.\n
+        Expression consists of field names separated by `.` (`*` matches any field, `..` searches at any depth),
+        each name may be followed by predicates: `[*]` (all values), `[1]` (value index), `[name]` (values which have
+        field `name`), `[name=value]` (values whose field `name` is equal to `value`).
+        Repeated tags are flattened, so `man.name` returns names of all men.
+
+        **expression** - path expression, compiled expressions are cached\n
+        **wrap** (default: `True`) - return dicts and lists wrapped into slurper objects
+        """
+        result = compile_selector(expression).select(_object_getattribute(self, '_value'))
+        if wrap:
+            return [XmlSlurper(item) if isinstance(item, _CONTAINER_TYPES) else item for item in result]
+        return result
+
+    def share(self, name: str = None, file_name: str = None):
+        """
+        Stores the document once per host in flat binary layout, returns `SharedDocument`.\n
+        Other processes attach slurper objects to it with `attach()`; data is not copied into their memory.
+
+        **name** (optional) - name of the new shared memory block, a unique name is generated if not set\n
+        **file_name** (optional) - store the document into the file instead of shared memory block
+        """
+        return SharedDocument.create(_object_getattribute(self, '_value'), name, file_name)
+
+    @classmethod
+    def attach(cls, name: str = None, file_name: str = None):
+        """
+        Create python object for the document stored by `share()`, values are decoded on access.
+
+        **name** (optional) - name of shared memory block (`SharedDocument.name`)\n
+        **file_name** (optional) - name of the file written by `share(file_name=...)`
+        """
+        return cls(_Image.attach(name, file_name).root())
+
+    def to_dict(self):
+        """
+        Returns copy of the document as plain dicts and lists (list for json arrays), no slurper objects are created.
+        Compact columns and attached shared documents are converted as well.
+        """
+        return _plain(_object_getattribute(self, '_value'))
+
+    def to_json(self, fp=None, ensure_ascii: bool = True, indent=None):
+        """
+        Returns the document as json text, or writes it to the text stream.\n
+        Top-level fields and repeated elements are encoded one by one, so large documents are not built as a whole
+        json string in memory.
+
+        **fp** (optional) - text stream the json is written to, `None` is returned\n
+        **ensure_ascii** (default: `True`) - escape non-ascii characters\n
+        **indent** (optional) - indentation of nested values, the whole document is written by python encoder
+        """
+        value = _object_getattribute(self, '_value')
+        if isinstance(value, (_SharedMap, _SharedList)):
+            value = _plain(value)  # C encoder reads list items directly and would get raw offsets
+        encoder = json.JSONEncoder(ensure_ascii=ensure_ascii, indent=indent, default=_json_default)
+        if fp is None:
+            return encoder.encode(value)
+        if indent is None:
+            _write_json(value, fp.write, encoder.encode, 2)
+        else:
+            for chunk in encoder.iterencode(value):
+                fp.write(chunk)
+
+    def dump(self, file, mapped: bool = False):
+        """
+        Writes the document in compact binary form to the file or binary stream, returns number of written bytes.
+        The document is read back with `load()`.
+
+        **file** - file name or binary stream\n
+        **mapped** (default: `False`) - write the layout of `share()`, which `load(lazy=True)` maps into memory;
+        otherwise the document is written as `marshal` data, which is smaller and is loaded several times faster
+        """
+        value = _object_getattribute(self, '_value')
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'wb') as f:
+                return _dump(value, f, mapped)
+        return _dump(value, file, mapped)
+
+    @classmethod
+    def load(cls, data=None, file_name: str = None, lazy: bool = False):
+        """
+        Create python object from the document written by `dump()`, no parsing and name translation is done.
+        Dumps are not checked against malicious data, load only the ones written by trusted code.
+
+        **data** (optional) - dumped document: bytes-like object or binary stream\n
+        **file_name** (optional) - file name of the dumped document\n
+        **lazy** (default: `False`) - map the file into memory and decode fields on access (see `attach()`),
+        the document must be dumped with `mapped=True`
+        """
+        if file_name is not None:
+            with open(file_name, 'rb') as f:
+                if lazy:
+                    if f.read(len(_DUMP_MAGIC)) == _DUMP_MAGIC:
+                        raise ValueError('Document is dumped without [mapped] and can not be loaded lazily')
+                    return cls.attach(file_name=file_name)
+                data = f.read()
+        elif isinstance(data, _STREAM_TYPES):
+            data = data.read()
+        if not isinstance(data, _BUFFER_TYPES):
+            raise TypeError('Illegal input argument [data]')
+        if bytes(data[:len(_DUMP_MAGIC)]) == _DUMP_MAGIC:
+            if lazy:
+                raise ValueError('Document is dumped without [mapped] and can not be loaded lazily')
+            return cls(_load_marshal(data))
+        image = _Image(data)
+        return cls(image.root() if lazy else image.load())
+
+    def apply_patch(self, patch, illegal_chars_action: int = Constants.REPLACE_WITH_UNDERSCORES, name_func=None):
+        """
+        Applies JSON Patch (RFC 6902) to the slurped document, only new values are converted.\n
+        Paths are JSON pointers to fields of the slurped document: `/man/1/born/year`. Values are converted as
+        the document would be: json values by `JsonSlurper`, xml elements by `XmlSlurper` (subtree replacement:
+        `{'op': 'replace', 'path': '/man/1', 'value': element}`). In xml documents `/man/-` appends repeated tag even
+        if there was single `man` tag. Changed containers are copied along the paths, the rest of the document is
+        shared, and the new document is swapped in atomically; nothing is changed if any operation fails.
+
+        **patch** - list of operations: `{'op': 'add', 'path': '/name', 'value': 'Joan'}`, operations are `add`,
+        `remove`, `replace`, `move`, `copy` and `test`\n
+        **illegal_chars_action** (default: `REPLACE_WITH_UNDERSCORES`) - action applied to tags whose names contain illegal characters\n
+        **name_func** (optional) - function (or `lambda`) used to convert tag name to field name
+        """
+        builder = _builder_class(type(self))(None, None, _default_options(illegal_chars_action=illegal_chars_action,
+                                                                          name_func=name_func))
+        patcher = _Patcher(builder._patch_value, builder._repeated_tags)
+        _object_setattr(self, '_value', patcher.apply(_object_getattribute(self, '_value'), patch))
+        return self
+
+    def __str__(self):
+        return str(_object_getattribute(self, '_value'))
+
+
+def _is_async_stream(data):
+    read = getattr(data, 'read', None)
+    if read is None:
+        return False
+    import inspect
+    return inspect.iscoroutinefunction(read)
+
+
+async def _aread_chunks(reader, chunk_size: int):
+    while True:
+        chunk = await reader.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+_LIST_ITEM = object()
+"""Key of the wrapper cache entry shared by all items of a list"""
+
+
+def _child_wrapper(slurper: AbstractSlurper, key, result):
+    """
+    Returns wrapper for the child value, wrappers are created once and reused while the value is the same.
+    List items share one cache entry, so iterating over a long list keeps only the last item wrapper.
+    """
+    if type(key) is not str:
+        key = _LIST_ITEM
+    children = _object_getattribute(slurper, '_children')
+    if children is None:
+        children = {}
+        _object_setattr(slurper, '_children', children)
+    else:
+        cached = children.get(key)
+        if cached is not None and cached[0] is result:
+            return cached[1]
+    wrapper = XmlSlurper(result)
+    children[key] = (result, wrapper)
+    if _profiler is not None:
+        _profiler.count('wrappers')
+    return wrapper
+
+
+class Selector:
+    """Compiled path expression (see `AbstractSlurper.select()`)"""
+    _tokens = re.compile(r'\.\.|\.|\[[^\]]*\]|[^.\[\]]+')
+    _literal = re.compile(r'^\s*([^=\s]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|(.*?))\s*$')
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.steps = []
+        recursive = False
+        expect_name = True
+        pos = 0
+        for match in self._tokens.finditer(expression):
+            token = match.group()
+            if match.start() != pos:
+                self._error(pos)
+            pos = match.end()
+            if token in ('.', '..'):
+                if (expect_name and (token == '.' or self.steps or recursive)) or recursive:
+                    self._error(match.start())
+                recursive = token == '..'
+                expect_name = True
+            elif token[0] == '[':
+                if expect_name:
+                    self._error(match.start())
+                self.steps[-1][2].append(self._predicate(token[1:-1].strip(), match.start()))
+            else:
+                if not expect_name:
+                    self._error(match.start())
+                self.steps.append((recursive, token.strip(), []))
+                recursive = False
+                expect_name = False
+        if expect_name or pos != len(expression):
+            self._error(pos)
+
+    def _error(self, pos: int):
+        raise ValueError('Illegal path expression {!r} at position {}'.format(self.expression, pos))
+
+    def _predicate(self, text: str, pos: int):
+        if text == '*':
+            return None
+        try:
+            index = int(text)
+            return lambda values: [values[index]] if -len(values) <= index < len(values) else []
+        except ValueError:
+            pass
+        match = self._literal.match(text)
+        if match is not None:
+            key = match.group(1)
+            literal = next(group for group in match.groups()[1:] if group is not None)
+            return lambda values: [value for value in values if isinstance(value, dict) and
+                                   any(str(item) == literal for item in _as_list(value.get(key, _MISSING)))]
+        if not text or '=' in text:
+            self._error(pos)
+        return lambda values: [value for value in values if isinstance(value, dict) and text in value]
+
+    @staticmethod
+    def _children(node, name: str, result: list):
+        if not isinstance(node, dict):
+            return result
+        if name == '*':
+            for value in node.values():
+                result.extend(_as_list(value))
+        else:
+            value = node.get(name, _MISSING)
+            if value is not _MISSING:
+                result.extend(_as_list(value))
+        return result
+
+    @classmethod
+    def _descendants(cls, node, name: str, groups: list):
+        if isinstance(node, dict):
+            if name == '*' or name in node:
+                groups.append(cls._children(node, name, []))
+            for value in node.values():
+                cls._descendants(value, name, groups)
+        elif isinstance(node, (list, ColumnarList)):
+            for value in node:
+                cls._descendants(value, name, groups)
+        return groups
+
+    def select(self, value):
+        """Returns list of values matching the expression in the converted document (plain dicts and lists)"""
+        nodes = _as_list(value)
+        for recursive, name, predicates in self.steps:
+            found = []
+            for node in nodes:
+                groups = self._descendants(node, name, []) if recursive else [self._children(node, name, [])]
+                for group in groups:
+                    for predicate in predicates:
+                        if predicate is not None:
+                            group = predicate(group)
+                    found.extend(group)
+            nodes = found
+        return nodes
+
+
+def _as_list(value):
+    if value is _MISSING:
+        return []
+    if isinstance(value, ColumnarList):
+        return list(value)
+    return value if isinstance(value, list) else [value]
+
+
+_selectors = {}
+
+
+def compile_selector(expression: str):
+    """Returns compiled `Selector` for the path expression, compiled selectors are cached"""
+    selector = _selectors.get(expression)
+    if selector is None:
+        selector = Selector(expression)
+        if len(_selectors) < 1024:
+            _selectors[expression] = selector
+    return selector
+
+
+class _Patcher:
+    """
+    Applies JSON Patch operations to converted document (see `AbstractSlurper.apply_patch()`).\n
+    Changed containers are copied along the path from the root, all other values are shared with the source document.
+    With `repeated_tags` single value of a field is treated as one-item list of repeated tags, and lists of
+    less than two items are collapsed back, as `XmlSlurperBuilder._get_map()` does.
+    """
+
+    def __init__(self, convert, repeated_tags: bool = False):
+        self.convert = convert
+        self.repeated_tags = repeated_tags
+
+    @staticmethod
+    def _pointer(pointer: str):
+        if pointer == '':
+            return []
+        if not isinstance(pointer, str) or not pointer.startswith('/'):
+            raise ValueError('Illegal JSON pointer: {!r}'.format(pointer))
+        return [part.replace('~1', '/').replace('~0', '~') for part in pointer[1:].split('/')]
+
+    def _container(self, value, part: str):
+        """Returns copy of the container which is indexed by `part`"""
+        if isinstance(value, dict) and not (self.repeated_tags and (part == '-' or part.isdigit())):
+            # views of lazy and shared documents (dict subclasses) hold raw values, they are copied via `items()`
+            return dict(value) if type(value) is dict else dict(value.items())
+        if isinstance(value, (list, ColumnarList)):
+            return list(value)
+        if self.repeated_tags and value is not _MISSING:
+            return [value]
+        raise ValueError('Value at [{}] is not a container'.format(part))
+
+    @staticmethod
+    def _key(container, part: str, insert: bool = False):
+        if isinstance(container, dict):
+            return part
+        if part == '-' and insert:
+            return len(container)
+        if not part.isdigit() or (len(part) > 1 and part[0] == '0'):
+            raise ValueError('Illegal array index: {!r}'.format(part))
+        index = int(part)
+        if index > len(container) or (index == len(container) and not insert):
+            raise ValueError('Array index out of range: {}'.format(index))
+        return index
+
+    def _update(self, value, path: list, change):
+        """Returns copy of `value` in which the container of the `path` target is changed by `change(container, key)`"""
+        container = self._container(value, path[0])
+        if len(path) == 1:
+            change(container, path[0])
+        else:
+            key = self._key(container, path[0])
+            if isinstance(container, dict) and key not in container:
+                raise ValueError('Path not found: {!r}'.format(path[0]))
+            item = self._update(container[key], path[1:], change)
+            if item is _MISSING:
+                del container[key]
+            else:
+                container[key] = item
+        if self.repeated_tags and isinstance(container, list) and len(container) < 2:
+            return container[0] if container else _MISSING
+        return container
+
+    def get(self, value, pointer: str):
+        for part in self._pointer(pointer):
+            if isinstance(value, dict) and not (self.repeated_tags and part.isdigit()):
+                if part not in value:
+                    raise ValueError('Path not found: {!r}'.format(pointer))
+                value = value[part]
+            else:
+                items = _as_list(value) if self.repeated_tags else value
+                if not isinstance(items, (list, ColumnarList)):
+                    raise ValueError('Path not found: {!r}'.format(pointer))
+                value = items[self._key(items, part)]
+        return value
+
+    def add(self, document, pointer: str, value):
+        path = self._pointer(pointer)
+        if not path:
+            return value
+
+        def change(container, part):
+            key = self._key(container, part, insert=True)
+            if isinstance(container, dict):
+                container[key] = value
+            else:
+                container.insert(key, value)
+
+        return self._update(document, path, change)
+
+    def remove(self, document, pointer: str):
+        path = self._pointer(pointer)
+        if not path:
+            raise ValueError('The whole document can not be removed')
+
+        def change(container, part):
+            key = self._key(container, part)
+            if isinstance(container, dict) and key not in container:
+                raise ValueError('Path not found: {!r}'.format(pointer))
+            del container[key]
+
+        result = self._update(document, path, change)
+        return {} if result is _MISSING else result
+
+    def replace(self, document, pointer: str, value):
+        path = self._pointer(pointer)
+        if not path:
+            return value
+
+        def change(container, part):
+            key = self._key(container, part)
+            if isinstance(container, dict) and key not in container:
+                raise ValueError('Path not found: {!r}'.format(pointer))
+            container[key] = value
+
+        return self._update(document, path, change)
+
+    def apply(self, document, patch):
+        """Returns patched copy of the document, the source document is not changed"""
+        for operation in patch:
+            op = operation.get('op')
+            path = operation.get('path')
+            if op == 'add':
+                document = self.add(document, path, self.convert(operation['value']))
+            elif op == 'remove':
+                document = self.remove(document, path)
+            elif op == 'replace':
+                document = self.replace(document, path, self.convert(operation['value']))
+            elif op in ('move', 'copy'):
+                value = self.get(document, operation['from'])
+                if op == 'move':
+                    if path.startswith(operation['from'] + '/'):
+                        raise ValueError('Value can not be moved into itself: {!r}'.format(path))
+                    document = self.remove(document, operation['from'])
+                document = self.add(document, path, value)
+            elif op == 'test':
+                if self.get(document, path) != self.convert(operation['value']):
+                    raise ValueError('Test failed: {!r}'.format(path))
+            else:
+                raise ValueError('Illegal patch operation: {!r}'.format(op))
+        return document
+
+
+class MaterializedNode:
+    """
+    Base class for `__slots__` classes generated for materialized documents (see `create(materialize=True)`).\n
+    One class is generated per distinct set of field names, so fields are read as native attributes.
+    """
+    __slots__ = ()
+    _fields = ()
+
+    def __getitem__(self, key: str):
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __str__(self):
+        return str({name: getattr(self, name) for name in self._fields})
+
+    __repr__ = __str__
+
+
+_materialized_classes = {}
+
+
+def _materialized_class(fields: tuple):
+    cls = _materialized_classes.get(fields, _MISSING)
+    if cls is _MISSING:
+        legal = all(isinstance(name, str) and name.isidentifier() and not name.startswith('_') for name in fields)
+        cls = type('MaterializedNode', (MaterializedNode,), {'__slots__': fields, '_fields': fields}) if legal else None
+        if len(_materialized_classes) >= 1024:
+            _materialized_classes.clear()
+        _materialized_classes[fields] = cls
+    return cls
+
+
+def _materialize(value, slurper_class):
+    if isinstance(value, dict):
+        cls = _materialized_class(tuple(value))
+        if cls is None:
+            return slurper_class({name: _materialize(item, slurper_class) for name, item in value.items()})
+        node = cls()
+        for name, item in value.items():
+            setattr(node, name, _materialize(item, slurper_class))
+        return node
+    if isinstance(value, list):
+        return [_materialize(item, slurper_class) for item in value]
+    return value
+
+
+def materialize(value, slurper_class=None):
+    """
+    Converts slurped document into the tree of `MaterializedNode` objects.\n
+    Tags whose names can't be used as python attributes are left as slurper objects of the `slurper_class`.
+    """
+    slurper_class = slurper_class or XmlSlurper
+    if isinstance(value, AbstractSlurper):
+        value = value._value
+    result = _materialize(value, slurper_class)
+    return result if isinstance(result, MaterializedNode) else slurper_class(result)
+
+
+_BOOLEANS = {'true': True, 'yes': True, 'on': True, 'false': False, 'no': False, 'off': False}
+_INT_PATTERN = re.compile(r'[-+]?(0|[1-9][0-9]*)\Z')
+_FLOAT_PATTERN = re.compile(r'[-+]?([0-9]+\.[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?\Z|[-+]?[0-9]+[eE][-+]?[0-9]+\Z')
+
+
+def to_bool(value):
+    """Converts `true`/`yes`/`on` and `false`/`no`/`off` strings (in any case) to boolean values"""
+    if isinstance(value, str):
+        try:
+            return _BOOLEANS[value.strip().lower()]
+        except KeyError:
+            raise ValueError('Not a boolean value: {!r}'.format(value))
+    return bool(value)
+
+
+def infer_type(value):
+    """Converts string to `int`, `float` or `bool` when it looks like one, otherwise returns it as is"""
+    if not isinstance(value, str):
+        return value
+    if _INT_PATTERN.match(value):
+        return int(value)
+    if _FLOAT_PATTERN.match(value):
+        return float(value)
+    lowered = value.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    return value
+
+
+class _TypeNode:
+    __slots__ = ('path', 'converter', 'children', 'any_child')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.converter = None
+        self.children = {}
+        self.any_child = None
+
+    def child(self, name: str):
+        if name == '*':
+            if self.any_child is None:
+                self.any_child = _TypeNode(self.path + '.*' if self.path else '*')
+            return self.any_child
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = _TypeNode(self.path + '.' + name if self.path else name)
+        return node
+
+
+class TypeSchema:
+    """
+    Precompiled value converters for slurped documents (see `types` argument of `create()`).\n
+    Keys of `types` are dot-separated field names from the root (`born.year`), `*` matches any field;
+    repeated elements are passed through, so `man.born.year` converts the year of every `man`.
+    Values are functions applied to raw leaf values: `int`, `float`, `bool` (converted with `to_bool()`),
+    `datetime.date.fromisoformat`, etc. `auto` - convert every leaf value with `infer_type()`.
+    The document is converted once at build time, field access returns native values.
+    """
+
+    def __init__(self, types):
+        self.auto = types == 'auto'
+        self.root = _TypeNode('')
+        if not self.auto:
+            for path, converter in dict(types).items():
+                if not callable(converter):
+                    raise TypeError('Converter for [{}] is not callable: {!r}'.format(path, converter))
+                node = self.root
+                for name in path.split('.'):
+                    node = node.child(name)
+                node.converter = to_bool if converter is bool else converter
+
+    def apply(self, value):
+        """Converts values of the document (plain dicts and lists) in place and returns it"""
+        if self.auto:
+            return self._infer(value)
+        return self._convert(value, self.root)
+
+    def _infer(self, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                value[key] = self._infer(item)
+        elif isinstance(value, list):
+            for i, item in enumerate(value):
+                value[i] = self._infer(item)
+        elif isinstance(value, str):
+            return infer_type(value)
+        return value
+
+    def _convert(self, value, node: _TypeNode):
+        if isinstance(value, list):
+            for i, item in enumerate(value):
+                value[i] = self._convert(item, node)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                child = node.children.get(key, node.any_child)
+                if child is not None:
+                    value[key] = self._convert(item, child)
+        elif node.converter is not None and value is not None:
+            try:
+                return node.converter(value)
+            except (TypeError, ValueError) as e:
+                raise ValueError('Can not convert value of [{}]: {}'.format(node.path, e)) from e
+        return value
+
+
+_type_schemas = {}
+
+
+def compile_types(types):
+    """Returns `TypeSchema` for the given `types` argument, schemas are compiled once and reused"""
+    if isinstance(types, TypeSchema):
+        return types
+    if isinstance(types, str) and types != 'auto':
+        raise ValueError('Illegal input argument [types]: {!r}'.format(types))
+    if not isinstance(types, str):
+        types = dict(types)  # mapping or list of (path, converter) pairs
+    key = types if isinstance(types, str) else tuple(sorted(types.items(), key=lambda item: item[0]))
+    schema = _type_schemas.get(key)
+    if schema is None:
+        if len(_type_schemas) >= 256:
+            _type_schemas.clear()
+        schema = _type_schemas[key] = TypeSchema(types)
+    return schema
+
+
+class _ProjectionNode:
+    __slots__ = ('children', 'any_child', 'whole')
+
+    def __init__(self):
+        self.children = {}
+        self.any_child = None
+        self.whole = False
+
+    def child(self, name: str):
+        if name == '*':
+            if self.any_child is None:
+                self.any_child = _ProjectionNode()
+            return self.any_child
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = _ProjectionNode()
+        return node
+
+    def merge(self, other):
+        self.whole = self.whole or other.whole
+        for name, node in other.children.items():
+            self.child(name).merge(node)
+        if other.any_child is not None:
+            self.child('*').merge(other.any_child)
+
+    def merge_wildcards(self):
+        """Adds paths under `*` to every named child, so named children are looked up without checking `*`"""
+        for node in self.children.values():
+            if self.any_child is not None:
+                node.merge(self.any_child)
+            node.merge_wildcards()
+        if self.any_child is not None:
+            self.any_child.merge_wildcards()
+
+
+class _ProjectionState:
+    """Partially kept container: include and exclude nodes of its field path, child states are cached"""
+    __slots__ = ('projection', 'include', 'exclude', 'keeps_leaf', 'children')
+
+    def __init__(self, projection, include, exclude):
+        self.projection = projection
+        self.include = include
+        self.exclude = exclude
+        self.keeps_leaf = include is True  # partially included fields must be containers
+        self.children = {}
+
+    def child(self, name: str):
+        """Returns projection state of the field `name` of the container"""
+        result = self.children.get(name, _MISSING)
+        if result is _MISSING:
+            result = self.children[name] = self._child(name)
+        return result
+
+    def _child(self, name: str):
+        include, exclude = self.include, self.exclude
+        if include is not True:
+            include = include.children.get(name, include.any_child)
+            if include is None:
+                return None
+            if include.whole:
+                include = True
+        if exclude is not None:
+            exclude = exclude.children.get(name, exclude.any_child)
+            if exclude is not None and exclude.whole:
+                return None
+        if include is True and exclude is None:
+            return True
+        return self.projection._state(include, exclude)
+
+
+class Projection:
+    """
+    Compiled `include` and `exclude` field paths (see `create()`).\n
+    Paths are dot-separated field names from the root (`man.born.year`), `*` matches any field; repeated elements
+    are passed through. Included fields are kept with their whole subtrees, together with the containers on
+    the way to them; excluded fields are removed from the included ones.
+    Projected documents are converted in the current process, `workers` option is not used.\n
+    Projection states are `True` (the whole subtree is kept), `None` (the field is dropped),
+    or opaque objects for partially kept containers.
+    """
+
+    def __init__(self, include=None, exclude=None):
+        self._states = {}
+        include = self._compile(include) if include else True
+        exclude = self._compile(exclude) if exclude else None
+        self.root = True if include is True and exclude is None else self._state(include, exclude)
+
+    def _state(self, include, exclude):
+        key = (id(include), id(exclude))
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _ProjectionState(self, include, exclude)
+        return state
+
+    @staticmethod
+    def _compile(paths):
+        if isinstance(paths, str):
+            paths = [paths]
+        root = _ProjectionNode()
+        for path in paths:
+            names = path.split('.')
+            if not all(names):
+                raise ValueError('Illegal field path: {!r}'.format(path))
+            node = root
+            for name in names:
+                node = node.child(name)
+            node.whole = True
+        root.merge_wildcards()
+        return root
+
+    @staticmethod
+    def child(state, name: str):
+        """Returns projection state of the field `name` of the container in the given state"""
+        return True if state is True else state.child(name)
+
+    @staticmethod
+    def keeps_leaf(state):
+        """Checks whether leaf value in the given state is kept: partially included fields must be containers"""
+        return state is True or state.keeps_leaf
+
+    def apply(self, value, name_of=None):
+        """
+        Returns projected copy of the document (plain dicts and lists).\n
+        `name_of` converts dictionary keys to field names, `None` result drops the key (default: keys are field names)
+        """
+        result = self.prune(value, self.root, name_of)
+        if result is _MISSING:
+            return [] if isinstance(value, (list, ColumnarList)) else {}
+        return result
+
+    def prune(self, value, state, name_of=None):
+        """Returns projected value in the given state, `_MISSING` if nothing is left (see `apply()`)"""
+        if state is True:
+            return value
+        partial = not state.keeps_leaf
+        if isinstance(value, dict):
+            result = {}
+            for key, item in value.items():
+                name = key if name_of is None else name_of(key)
+                child = None if name is None else state.child(name)
+                if child is not None:
+                    item = self.prune(item, child, name_of)
+                    if item is not _MISSING:
+                        result[key] = item
+            return _MISSING if partial and not result else result
+        if isinstance(value, (list, ColumnarList)):
+            result = [item for item in (self.prune(item, state, name_of) for item in value) if item is not _MISSING]
+            return _MISSING if partial and not result else result
+        return _MISSING if partial else value
+
+
+_projections = {}
+
+
+def compile_projection(include=None, exclude=None):
+    """Returns `Projection` for `include` and `exclude` arguments, `None` if both are empty"""
+    if not include and not exclude:
+        return None
+    key = (tuple([include] if isinstance(include, str) else include or ()),
+           tuple([exclude] if isinstance(exclude, str) else exclude or ()))
+    projection = _projections.get(key)
+    if projection is None:
+        if len(_projections) >= 256:
+            _projections.clear()
+        projection = _projections[key] = Projection(include, exclude)
+    return projection
+
+
+class NameCache:
+    """
+    Bounded cache of translated tag names (see `AbstractSlurperBuilder._extract_name()`).\n
+    Documents repeat the same few tag names many times, so each distinct name is translated only once.
+    The same cache can be passed to several `create()` calls through the `name_cache` argument.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._names = {}
+
+    def translate(self, name: str, illegal_chars_action, name_func=None, illegal_chars: tuple = ('-', '.'),
+                  illegal_chars_mask: str = '[-.]', namespaces: bool = False):
+        """Returns field name for the given tag name, `namespaces` - strip namespace from tag name before translation"""
+        key = (name, illegal_chars_action, name_func, illegal_chars, illegal_chars_mask, namespaces)
+        result = self._names.get(key, _MISSING)
+        if result is _MISSING:
+            self.misses += 1
+            if not isinstance(name, str):
+                result = None  # comments and processing instructions have factory functions as tags
+            else:
+                result = AbstractSlurperBuilder._extract_name(strip_namespace(name) if namespaces else name,
+                                                              illegal_chars_action, name_func, illegal_chars,
+                                                              illegal_chars_mask)
+            if len(self._names) < self.max_size:
+                self._names[key] = result
+        else:
+            self.hits += 1
+        return result
+
+    def stats(self):
+        """Returns cache statistics: number of hits and misses, hit rate, and number of cached names"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._names),
+            'max_size': self.max_size
+        }
+
+    def clear(self):
+        self.hits = 0
+        self.misses = 0
+        self._names.clear()
+
+
+_profiler = None
+
+
+class Profiler:
+    """
+    Opt-in instrumentation of slurpers: time spent in conversion phases and counters of processed data.\n
+    Used as context manager, documents slurped inside of the `with` block (in any thread) are recorded.
+    Phases: `parse`, `convert` (`_get_map()`), `translate` (tag name translation, part of `convert`), `types`,
+    `compact`, `materialize`. Counters: `documents`, `nodes` (converted values), `names` (translated names),
+    `name_cache_hits`, `slurp_cache_hits`, `slurp_cache_misses`, `wrappers` (slurper objects created on field access).
+    Results are returned by `report()`, and are sent to `sink` when the block is exited: the sink is either a function
+    called with metric name and value (e.g. `gauge` method of statsd client) or `logging.Logger`.
+    When no profiler is active, instrumentation costs one global variable check per phase.
+    """
+
+    def __init__(self, sink=None, prefix: str = 'slurpers'):
+        self.sink = sink
+        self.prefix = prefix
+        self.timings = {}
+        self.counters = {}
+        self._previous = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        global _profiler
+        self._previous = _profiler
+        _profiler = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _profiler
+        _profiler = self._previous
+        if self.sink is not None:
+            self.emit(self.sink)
+
+    def add_time(self, phase: str, seconds: float):
+        with self._lock:
+            timing = self.timings.get(phase)
+            if timing is None:
+                self.timings[phase] = [1, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self):
+        """Returns recorded data: `{'timings': {phase: {'calls': ..., 'seconds': ...}}, 'counters': {name: ...}}`"""
+        with self._lock:
+            return {
+                'timings': {phase: {'calls': calls, 'seconds': seconds}
+                            for phase, (calls, seconds) in self.timings.items()},
+                'counters': dict(self.counters)
+            }
+
+    def metrics(self):
+        """Returns recorded data as list of (metric name, value) pairs: `slurpers.parse.seconds`, `slurpers.nodes`"""
+        report = self.report()
+        result = []
+        for phase, timing in report['timings'].items():
+            result.append(('{}.{}.calls'.format(self.prefix, phase), timing['calls']))
+            result.append(('{}.{}.seconds'.format(self.prefix, phase), timing['seconds']))
+        result.extend(('{}.{}'.format(self.prefix, name), value) for name, value in report['counters'].items())
+        return result
+
+    def emit(self, sink):
+        """Sends metrics to the sink: function called with metric name and value, or `logging.Logger`"""
+        import logging
+        for name, value in self.metrics():
+            if isinstance(sink, logging.Logger):
+                sink.info('%s=%s', name, value)
+            else:
+                sink(name, value)
+
+    def reset(self):
+        with self._lock:
+            self.timings.clear()
+            self.counters.clear()
+
+
+def _timed(phase: str, func, *args, **kwargs):
+    """Calls the function, its time is recorded as `phase` when profiling is enabled (see `Profiler`)"""
+    profiler = _profiler
+    if profiler is None:
+        return func(*args, **kwargs)
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.add_time(phase, time.perf_counter() - start)
+
+
+class _ProfiledNameCache:
+    """`NameCache` proxy which records time of name translations (see `Profiler`)"""
+    __slots__ = ('name_cache', 'profiler')
+
+    def __init__(self, name_cache: NameCache, profiler: Profiler):
+        self.name_cache = name_cache
+        self.profiler = profiler
+
+    def translate(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.name_cache.translate(*args, **kwargs)
+        finally:
+            self.profiler.add_time('translate', time.perf_counter() - start)
+
+
+def _count_nodes(value):
+    if isinstance(value, dict):
+        return 1 + sum(_count_nodes(item) for item in value.values())
+    if isinstance(value, list):
+        return 1 + sum(_count_nodes(item) for item in value)
+    return 1
+
+
+class SlurpCache:
+    """
+    Persistent on-disk cache of converted documents (see `cache` argument of `create()`).\n
+    Entries are keyed by file path and conversion options, and are valid while file size and modification time
+    (or, when only the time differs, content hash) stay the same. Cache hits skip parsing entirely.
+    The least recently used entries are removed when total size of the cache exceeds `max_size` bytes.
+    """
+    suffix = '.slc'
+
+    def __init__(self, directory: str, max_size: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _digest(data: bytes):
+        import hashlib
+        return hashlib.sha1(data).hexdigest()[:20]
+
+    @staticmethod
+    def _file_hash(file_name: str):
+        import hashlib
+        digest = hashlib.sha1()
+        with open(file_name, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _file_prefix(self, file_name: str):
+        return self._digest(os.path.abspath(file_name).encode('utf-8'))
+
+    def _entry_path(self, builder):
+        name_func = builder.options.get('name_func')
+        if name_func is None:
+            func_name = ''
+        else:
+            func_name = '{}.{}'.format(getattr(name_func, '__module__', ''), getattr(name_func, '__qualname__', ''))
+            if '<' in func_name:
+                return None  # lambdas and nested functions can't be identified between runs
+        key = (type(builder).__name__, builder.options.get('illegal_chars_action'), func_name,
+               builder.options.get('file_charset'))
+        if builder.projection is not None:
+            key += (builder.options.get('include'), builder.options.get('exclude'))
+        options_key = repr(key)
+        return os.path.join(self.directory, '{}-{}{}'.format(self._file_prefix(builder.file_name),
+                                                             self._digest(options_key.encode('utf-8')), self.suffix))
+
+    def load(self, builder):
+        """Returns converted document for the builder's file, from the cache or by parsing the file"""
+        import pickle
+        path = self._entry_path(builder)
+        if path is None:
+            return builder._parse_file()
+        stat = os.stat(builder.file_name)
+        content_hash = None
+        try:
+            with open(path, 'rb') as f:
+                meta = pickle.load(f)
+                if meta['size'] == stat.st_size:
+                    if meta['mtime'] != stat.st_mtime_ns:
+                        content_hash = self._file_hash(builder.file_name)
+                    if meta['mtime'] == stat.st_mtime_ns or meta['hash'] == content_hash:
+                        value = pickle.load(f)
+                        self.hits += 1
+                        if _profiler is not None:
+                            _profiler.count('slurp_cache_hits')
+                        if content_hash is None:
+                            os.utime(path)
+                        else:
+                            self._store(path, stat, content_hash, value)
+                        return value
+        except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError):
+            pass
+        self.misses += 1
+        if _profiler is not None:
+            _profiler.count('slurp_cache_misses')
+        if content_hash is None:
+            content_hash = self._file_hash(builder.file_name)
+        value = builder._parse_file()
+        self._store(path, stat, content_hash, value)
+        self._evict()
+        return value
+
+    def _store(self, path: str, stat, content_hash: str, value):
+        import pickle
+        temp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp_path, 'wb') as f:
+            pickle.dump({'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'hash': content_hash}, f,
+                        pickle.HIGHEST_PROTOCOL)
+            pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def _entries(self, prefix: str = ''):
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(prefix) and entry.name.endswith(self.suffix):
+                yield entry
+
+    def _evict(self):
+        entries = [(entry.stat(), entry.path) for entry in self._entries()]
+        total = sum(stat.st_size for stat, path in entries)
+        for stat, path in sorted(entries, key=lambda e: e[0].st_mtime_ns):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= stat.st_size
+
+    def invalidate(self, file_name: str = None):
+        """Removes cached entries for the given file, or all entries when `file_name` is not set"""
+        for entry in list(self._entries(self._file_prefix(file_name) + '-' if file_name is not None else '')):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        """Returns cache statistics: number of hits and misses, number of entries and their total size"""
+        entries = [entry.stat().st_size for entry in self._entries()]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(entries), 'size': sum(entries),
+                'max_size': self.max_size}
+
+
+class XmlBackend:
+    """
+    Xml parser backend based on `xml.etree.ElementTree` (see `register_backend()`).\n
+    Backends return `ElementTree`-compatible elements: `tag`, `text`, `attrib`, `len()` and iteration over children.
+    """
+    name = 'stdlib'
+
+    def parse(self, source):
+        """Parses file name or stream, returns root element"""
+        return ElementTree.parse(source).getroot()
+
+    def fromstring(self, text):
+        return ElementTree.fromstring(text)
+
+    def iterparse(self, source, events: tuple):
+        return ElementTree.iterparse(source, events=events)
+
+    def parse_buffer(self, buffer, chunk_size: int = 1024 * 1024):
+        """Parses bytes-like object (`bytes`, `memoryview`, `mmap`), the buffer is fed to parser without copying"""
+        parser = ElementTree.XMLParser()
+        view = memoryview(buffer)
+        for i in range(0, len(view), chunk_size):
+            parser.feed(view[i:i + chunk_size])
+        return parser.close()
+
+    def is_element(self, data):
+        return isinstance(data, ElementTree.Element)
+
+
+class LxmlBackend(XmlBackend):
+    """Xml parser backend based on `lxml.etree`, comments and processing instructions are skipped"""
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree
+        self.etree = etree
+        self.parser = etree.XMLParser(remove_comments=True, remove_pis=True)
+        self.text_parser = etree.XMLParser(remove_comments=True, remove_pis=True, encoding='utf-8')
+
+    def _parse_error(self, e):
+        # errors are reported the same way as by `ElementTree`
+        error = ElementTree.ParseError(str(e))
+        error.code = getattr(e, 'code', None)
+        error.position = getattr(e, 'position', None)
+        return error
+
+    def parse(self, source):
+        try:
+            return self.etree.parse(source, self.parser).getroot()
+        except self.etree.XMLSyntaxError as e:
+            raise self._parse_error(e) from e
 
+    def fromstring(self, text):
+        try:
+            if isinstance(text, str):
+                return self.etree.fromstring(text.encode('utf-8'), self.text_parser)
+            return self.etree.fromstring(text, self.parser)
+        except self.etree.XMLSyntaxError as e:
+            raise self._parse_error(e) from e
 
-def strip_illegal_chars(s: str, illegal_chars_mask: str = '[-.]'):
-    return replace_illegal_chars_with(s, '', illegal_chars_mask)
+    def iterparse(self, source, events: tuple):
+        if isinstance(source, io.TextIOBase):
+            events = self.etree.iterparse(_EncodedReader(source), events=events, encoding='utf-8',
+                                          remove_comments=True, remove_pis=True)
+        else:
+            events = self.etree.iterparse(source, events=events, remove_comments=True, remove_pis=True)
+        try:
+            yield from events
+        except self.etree.XMLSyntaxError as e:
+            raise self._parse_error(e) from e
 
+    def parse_buffer(self, buffer, chunk_size: int = 1024 * 1024):
+        parser = self.etree.XMLParser(remove_comments=True, remove_pis=True)
+        view = memoryview(buffer)
+        try:
+            for i in range(0, len(view), chunk_size):
+                parser.feed(bytes(view[i:i + chunk_size]))  # lxml feed parser doesn't accept buffers
+            return parser.close()
+        except self.etree.XMLSyntaxError as e:
+            raise self._parse_error(e) from e
 
-class AbstractSlurper(metaclass=ABCMeta):
-    def __init__(self, value):
-        self._value = value
-        self._illegal_chars_action = Constants.REPLACE_WITH_UNDERSCORES
+    def is_element(self, data):
+        return isinstance(data, self.etree._Element)
 
-    def __len__(self):
-        return len(self._value)
 
-    def __getattribute__(self, key: str):
+class _EncodedReader:
+    """Binary stream view of text stream"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def read(self, size: int = -1):
+        return self.stream.read(size).encode('utf-8')
+
+
+class JsonBackend:
+    """Json parser backend based on `json` module (see `register_backend()`)"""
+    name = 'stdlib'
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def load_file(self, file_name: str, charset: str):
+        with open(file_name, "r", encoding=charset) as f:
+            return self.loads(f.read())
+
+    def loads_buffer(self, buffer, charset: str):
+        """Parses bytes-like object (`bytes`, `memoryview`, `mmap`) in the given charset"""
+        return self.loads(str(buffer, charset))
+
+
+class OrjsonBackend(JsonBackend):
+    """
+    Json parser backend based on `orjson`, utf-8 files are parsed without decoding.\n
+    Documents which `orjson` reads differently from `json` module are parsed by `json`: integers longer than 64 bits
+    (`orjson` makes floats of them), `NaN`, `Infinity` and numbers out of float range (`orjson` rejects them).
+    """
+    name = 'orjson'
+    _digits = bytes(b'0'[0] if b'0'[0] <= i <= b'9'[0] else b' '[0] for i in range(256))
+    _long_number = b'0' * 19  # shortest digit run which may not fit in 64-bit integer
+    _chunk_size = 1 << 20
+
+    def __init__(self):
+        import orjson
+        self._loads = orjson.loads
+        self._error = orjson.JSONDecodeError
+
+    def loads(self, data):
+        if isinstance(data, str):
+            try:
+                buffer = data.encode('utf-8')
+            except UnicodeEncodeError:  # lone surrogates
+                return super().loads(data)
+        else:
+            buffer = data
+        view = memoryview(buffer)
+        if not self._has_long_number(view):
+            try:
+                return self._loads(view)
+            except self._error:
+                pass  # invalid json or extensions of `json` module: `NaN`, `Infinity`, `1e400`
+        return super().loads(data if isinstance(data, str) else str(view, 'utf-8'))
+
+    def _has_long_number(self, view):
+        """Checks whether the document has a run of digits which may be an integer longer than 64 bits"""
+        overlap = len(self._long_number) - 1
+        for i in range(0, len(view), self._chunk_size):
+            if bytes(view[i:i + self._chunk_size + overlap]).translate(self._digits).find(self._long_number) >= 0:
+                return True
+        return False
+
+    def load_file(self, file_name: str, charset: str):
+        if codecs.lookup(charset).name != 'utf-8':
+            return super().load_file(file_name, charset)
+        with open(file_name, "rb") as f:
+            return self.loads(f.read())
+
+    def loads_buffer(self, buffer, charset: str):
+        if codecs.lookup(charset).name != 'utf-8':
+            return super().loads_buffer(buffer, charset)
+        return self.loads(buffer)
+
+
+_backends = {
+    # lxml parses faster, but walking its element proxies makes the whole conversion slower than with ElementTree
+    'xml': {'stdlib': XmlBackend, 'lxml': LxmlBackend},
+    'json': {'orjson': OrjsonBackend, 'stdlib': JsonBackend}
+}
+_backend_instances = {}
+
+
+def register_backend(kind: str, name: str, backend_class, preferred: bool = False):
+    """
+    Registers parser backend.\n
+    **kind** - `xml` or `json`\n
+    **name** - backend name used in `backend` argument of `create()`\n
+    **backend_class** - `XmlBackend` or `JsonBackend` subclass; its constructor raises `ImportError`
+    when required package isn't installed\n
+    **preferred** (default: `False`) - try the backend first in `auto` mode
+    """
+    backends = _backends.setdefault(kind, {})
+    backends.pop(name, None)
+    if preferred:
+        _backends[kind] = dict([(name, backend_class)] + list(backends.items()))
+    else:
+        backends[name] = backend_class
+    _backend_instances.pop((kind, name), None)
+
+
+def _is_xml_element(data):
+    return isinstance(data, ElementTree.Element) or \
+        any(_get_backend_instance('xml', name).is_element(data) for name in available_backends('xml'))
+
+
+def available_backends(kind: str):
+    """Returns names of installed backends of the given kind in `auto` mode order"""
+    return [name for name in _backends[kind] if _get_backend_instance(kind, name) is not None]
+
+
+def _get_backend_instance(kind: str, name: str):
+    key = (kind, name)
+    if key not in _backend_instances:
         try:
-            return super.__getattribute__(self, key)
-        except:
-            local_value = object.__getattribute__(self, "_value")
-            if key == "_value":
-                return local_value
-            if isinstance(local_value, (list, dict)):
-                if key in local_value:
-                    result = local_value[key]
-                    if isinstance(result, (list, dict)):
-                        return XmlSlurper(result)
-                    else:
-                        return result
-                else:
-                    raise KeyError(key)
-            return local_value  # or raise KeyError(key)??
+            _backend_instances[key] = _backends[kind][name]()
+        except ImportError:
+            _backend_instances[key] = None
+    return _backend_instances[key]
 
-    def __getitem__(self, key: str):
+
+def get_backend(kind: str, name: str = 'auto'):
+    """
+    Returns parser backend: `auto` - the first installed one in registration order (xml: `stdlib`, `lxml`;
+    json: `orjson`, `stdlib`; backends registered with `preferred=True` go first), or backend with the given name
+    """
+    if kind not in _backends:
+        raise ValueError('Illegal backend kind: {!r}'.format(kind))
+    if name == 'auto':
+        for backend_name in _backends[kind]:
+            backend = _get_backend_instance(kind, backend_name)
+            if backend is not None:
+                return backend
+    if name not in _backends[kind]:
+        raise ValueError('Unknown {} backend: {!r}'.format(kind, name))
+    backend = _get_backend_instance(kind, name)
+    if backend is None:
+        raise ValueError('{} backend {!r} is not installed'.format(kind, name))
+    return backend
+
+
+class _MappedFile:
+    """Read-only memory map of the file, used as context manager returning `memoryview` of the file content"""
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.mapped = None
+        self.view = None
+
+    def __enter__(self):
+        import mmap
+        with open(self.file_name, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                self.view = memoryview(b'')  # empty files can't be mapped
+            else:
+                self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.view = memoryview(self.mapped)
+        return self.view
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.view.release()
+        if self.mapped is not None:
+            self.mapped.close()
+
+
+_shard_source = None
+"""Builder and items converted by forked worker processes (see `_convert_sharded()`)"""
+_shard_lock = threading.Lock()
+
+
+def _fork_available():
+    import multiprocessing
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def _convert_shard(start: int, stop: int):
+    builder, items = _shard_source
+    return builder._convert_items(items[start:stop])
+
+
+def _convert_sharded(builder, items: list, workers: int):
+    """
+    Converts items in forked worker processes (see `workers` option), returns the list of converted items in order.\n
+    Workers inherit the parsed document from the parent process, so only the converted shards are transferred.
+    """
+    global _shard_source
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    size = -(-len(items) // (workers * 4))  # several shards per worker balance uneven items
+    starts = range(0, len(items), size)
+    with _shard_lock:
+        _shard_source = (builder, items)
         try:
-            return super.__getitem__(self, key)
-        except:
-            local_value = self._value
-            if isinstance(local_value, (list, dict)):
-                result = local_value[key]
-                if isinstance(result, (list, dict)):
-                    return XmlSlurper(result)
-                else:
-                    return result
-            return local_value
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+                shards = list(executor.map(_convert_shard, starts, [start + size for start in starts]))
+        finally:
+            _shard_source = None
+    return [item for shard in shards for item in shard]
 
-    def __str__(self):
-        return str(self._value)
+
+def _merge_field(result: dict, name, value):
+    """Adds field value to the converted element, repeated fields are merged into lists"""
+    if name in result:
+        if isinstance(result[name], list):
+            result[name].append(value)
+        else:
+            result[name] = [result[name], value]
+    else:
+        result[name] = value
 
 
 class AbstractSlurperBuilder(metaclass=ABCMeta):
@@ -98,11 +1645,98 @@ class AbstractSlurperBuilder(metaclass=ABCMeta):
         self.data = data
         self.file_name = file_name
         self.options = options
+        self.name_cache = (options or {}).get('name_cache') or NameCache()
+        self.backend = get_backend(self._backend_kind, (options or {}).get('backend') or 'auto') \
+            if self._backend_kind else None
+
+    _backend_kind = None
+    """Kind of parser backends used by the builder (see `register_backend()`)"""
+
+    _repeated_tags = False
+    """Repeated fields are merged into lists, single field is not a list (see `AbstractSlurper.apply_patch()`)"""
+
+    @property
+    @abstractmethod
+    def slurper_class(self):
+        return None
+
+    @property
+    def projection(self):
+        """`Projection` built from `include` and `exclude` options, `None` if the whole document is converted"""
+        return compile_projection(self.options.get('include'), self.options.get('exclude'))
+
+    def _slurp(self, value):
+        """Wraps converted document into the slurper object according to the options"""
+        if _profiler is not None:
+            _profiler.count('documents')
+        types = self.options.get('types')
+        if types:
+            value = _timed('types', compile_types(types).apply, value)
+        if self.options.get('compact'):
+            value = _timed('compact', _compact, value)
+        if self.options.get('materialize'):
+            return _timed('materialize', materialize, value, self.slurper_class)
+        return self.slurper_class(value)
+
+    def _patch_value(self, value):
+        """Converts value of patch operation (see `AbstractSlurper.apply_patch()`)"""
+        return self._get_map(value, self.options)
+
+    def _convert(self, tree):
+        """Converts parsed document to plain dicts and lists with `_get_map()`"""
+        profiler = _profiler
+        if profiler is None:
+            return self._get_document(tree)
+        name_cache = self.name_cache
+        hits, misses = name_cache.hits, name_cache.misses
+        self.name_cache = _ProfiledNameCache(name_cache, profiler)
+        try:
+            result = _timed('convert', self._get_document, tree)
+        finally:
+            self.name_cache = name_cache
+        profiler.count('nodes', _count_nodes(result))
+        profiler.count('names', name_cache.hits - hits + name_cache.misses - misses)
+        profiler.count('name_cache_hits', name_cache.hits - hits)
+        return result
+
+    def _get_document(self, tree):
+        """Converts the whole document, in several processes when `workers` option is set"""
+        workers = self.options.get('workers') or 1
+        if workers > 1:
+            split = self._split(tree)
+            if split is not None:
+                items, assemble = split
+                if len(items) >= workers and _fork_available():
+                    return assemble(_convert_sharded(self, items, workers))
+        return self._get_map(tree, self.options)
+
+    def _split(self, tree):
+        """
+        Returns top-level repeated children of the parsed document and the function which builds the converted
+        document from the list of converted children (see `_convert_items()`), or `None` if it can't be split
+        """
+        return None
+
+    def _convert_items(self, items):
+        """Converts top-level children of the document, returns list of (field name, value) pairs"""
+        return [(None, self._get_map(item, self.options)) for item in items]
 
     @abstractmethod
     def fromFile(self):
         return None
 
+    @abstractmethod
+    def _parse_file(self):
+        """Parses `file_name` and returns converted document (plain dicts and lists)"""
+        return None
+
+    def _load_file(self):
+        """Returns converted document for `file_name`, using the `cache` option when it is set"""
+        cache = self.options.get('cache')
+        if cache is None:
+            return self._parse_file()
+        return cache.load(self)
+
     @abstractmethod
     def fromString(self):
         return None
@@ -119,10 +1753,7 @@ class AbstractSlurperBuilder(metaclass=ABCMeta):
     def _extract_name(child_name: str, illegal_chars_action, name_func=None, illegal_chars: tuple = ('-', '.'),
                       illegal_chars_mask: str = '[-.]'):
         result = child_name
-        has_illegal_chars = False
-        for c in illegal_chars:
-            has_illegal_chars = has_illegal_chars or c in result
-        if has_illegal_chars:
+        if any(c in result for c in illegal_chars):
             if illegal_chars_action == Constants.REPLACE_WITH_UNDERSCORES:
                 result = replace_illegal_chars_with(result, '_', illegal_chars_mask=illegal_chars_mask)
             elif illegal_chars_action == Constants.STRIP_CAPITALIZE:
@@ -135,22 +1766,262 @@ class AbstractSlurperBuilder(metaclass=ABCMeta):
         return result
 
 
+_LAZY_CONVERTED_TYPES = (str, dict, list, type(None))
+
+
+class _LazyXmlMap(dict):
+    """
+    Dictionary of xml-tag children which are converted on first access (see `XmlSlurper.create(lazy=True)`).\n
+    Values are stored as raw elements until requested, then replaced with converted ones.
+    """
+    __slots__ = ('_builder', '_options')
+
+    def __init__(self, builder, options: dict, elem):
+        super().__init__()
+        self._builder = builder
+        self._options = options
+        illegal_chars_action = options['illegal_chars_action']
+        name_func = options['name_func']
+        translate = builder.name_cache.translate
+        for child in elem:
+            child_name = translate(child.tag, illegal_chars_action, name_func, namespaces=True)
+            if not (child_name is None):
+                self._add(child_name, child)
+        for attr in elem.attrib:
+            self._add(attr, elem.attrib[attr])
+
+    def _add(self, name, value):
+        if name in self:
+            current = dict.__getitem__(self, name)
+            if isinstance(current, _LazyXmlList):
+                current.append(value)
+            else:
+                dict.__setitem__(self, name, _LazyXmlList(self, [current, value]))
+        else:
+            dict.__setitem__(self, name, value)
+
+    def _convert(self, value):
+        if not isinstance(value, _LAZY_CONVERTED_TYPES):
+            return self._builder._get_lazy_map(value, self._options)
+        return value
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if not isinstance(value, _LAZY_CONVERTED_TYPES):
+            value = self._convert(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def copy(self):
+        return dict(self.items())
+
+    def __iter__(self):
+        # overriding the slot makes `dict(m)` and `{**m}` read values through `__getitem__` instead of raw storage
+        return dict.__iter__(self)
+
+    def __eq__(self, other):
+        return dict(self.items()) == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class _LazyXmlList(list):
+    """List of repeated xml-tag children which are converted on first access"""
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner: _LazyXmlMap, values):
+        super().__init__(values)
+        self._owner = owner
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        value = list.__getitem__(self, index)
+        if not isinstance(value, _LAZY_CONVERTED_TYPES):
+            value = self._owner._convert(value)
+            list.__setitem__(self, index, value)
+        return value
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class _XmlPathMatcher:
+    """
+    Tracks `iterparse` events and reports elements matching the given path (see `XmlSlurper.iterate()`).\n
+    Elements outside matched subtrees are cleared as soon as they are closed, so memory stays flat.
+    """
+
+    def __init__(self, path: str):
+        self.path = [part for part in path.split('/') if part]
+        if not self.path:
+            raise ValueError('Illegal input argument [path]')
+        self.stack = []
+        self.prefix = []
+
+    def feed(self, event: str, elem):
+        """Processes single parser event, returns matched element on its `end` event or `None`"""
+        depth = len(self.stack)
+        if event == 'start':
+            matches = depth < len(self.path) and (depth == 0 or self.prefix[-1]) \
+                and self.path[depth] in ('*', strip_namespace(elem.tag))
+            self.stack.append(elem)
+            self.prefix.append(matches)
+            return None
+        self.stack.pop()
+        matches = self.prefix.pop()
+        if depth == len(self.path) and matches:
+            return elem
+        if depth > len(self.path) and self.prefix[len(self.path) - 1]:
+            return None  # inside of a matched element, it's released together with its owner
+        self.release(elem)
+        return None
+
+    def release(self, elem):
+        """Clears processed element and detaches it from its parent"""
+        elem.clear()
+        if self.stack:
+            self.stack[-1].remove(elem)
+
+
 class XmlSlurperBuilder(AbstractSlurperBuilder):
+    _backend_kind = 'xml'
+    _repeated_tags = True
+
+    @property
+    def slurper_class(self):
+        return XmlSlurper
 
     def fromFile(self):
-        return self._fromTree(ElementTree.parse(self.file_name).getroot())
+        if self.options.get('lazy'):
+            return self._fromTree(self._parse_tree())
+        return self._slurp(self._load_file())
+
+    def _parse_file(self):
+        return self._convert(self._parse_tree())
+
+    def _parse_tree(self):
+        if self.options.get('mmap'):
+            with _MappedFile(self.file_name) as view:
+                return _timed('parse', self.backend.parse_buffer, view)
+        return _timed('parse', self.backend.parse, self.file_name)
 
     def fromString(self):
-        return self._fromTree(ElementTree.fromstring(self.data))
+        return self._fromTree(_timed('parse', self.backend.fromstring, self.data))
+
+    def fromBuffer(self):
+        return self._fromTree(_timed('parse', self.backend.parse_buffer, self.data))
 
     def fromStream(self):
-        return self._fromTree(ElementTree.fromstring(self.data.read()))
+        if isinstance(self.data, _io._TextIOBase):
+            return self._fromTree(_timed('parse', self.backend.fromstring, self.data.read()))
+        return self._fromTree(_timed('parse', self.backend.parse, self.data))
 
     def fromTree(self):
         return self._fromTree(self.data)
 
+    def iterate(self, path: str):
+        matcher = _XmlPathMatcher(path)
+        source = self.file_name
+        if source is None:
+            if isinstance(self.data, str):
+                source = io.StringIO(self.data)
+            elif isinstance(self.data, _BUFFER_TYPES):
+                source = io.BytesIO(self.data)
+            else:
+                source = self.data
+        for event, elem in self.backend.iterparse(source, ('start', 'end')):
+            match = matcher.feed(event, elem)
+            if match is not None:
+                value = self._get_map(match, self.options)
+                matcher.release(match)
+                yield XmlSlurper(value)
+
     def _fromTree(self, tree):
-        return XmlSlurper(self._get_map(tree, self.options))
+        if self.options.get('lazy'):
+            return XmlSlurper(self._get_lazy_map(tree, self.options))
+        return self._slurp(self._convert(tree))
+
+    def _patch_value(self, value):
+        return self._get_map(value, self.options) if _is_xml_element(value) else value
+
+    def _get_document(self, tree):
+        projection = self.projection
+        if projection is None:
+            return super()._get_document(tree)
+        result = self._get_projected_map(tree, projection.root, projection)
+        return {} if result is _MISSING else result
+
+    def _get_projected_map(self, elem, state, projection):
+        """Converts projected fields of the parsed element, dropped subtrees are neither translated nor converted"""
+        if state is True:
+            return self._get_map(elem, self.options)
+        if len(elem) == 0:
+            return elem.text if projection.keeps_leaf(state) else _MISSING
+        result = {}
+        illegal_chars_action = self.options['illegal_chars_action']
+        name_func = self.options['name_func']
+        translate = self.name_cache.translate
+        for child in elem:
+            child_name = translate(child.tag, illegal_chars_action, name_func, namespaces=True)
+            if child_name is not None:
+                item_state = state.child(child_name)
+                if item_state is not None:
+                    child_map = self._get_projected_map(child, item_state, projection)
+                    if child_map is not _MISSING:
+                        _merge_field(result, child_name, child_map)
+        for attr in elem.attrib:
+            attr_state = state.child(attr)
+            if attr_state is not None and projection.keeps_leaf(attr_state):
+                _merge_field(result, attr, elem.attrib[attr])
+        return _MISSING if not result and not state.keeps_leaf else result
+
+    def _split(self, elem):
+        children = list(elem)
+        if len(children) < 2:
+            return None
+
+        def assemble(pairs):
+            result = {}
+            for name, child_map in pairs:
+                _merge_field(result, name, child_map)
+            for attr in elem.attrib:
+                _merge_field(result, attr, elem.attrib[attr])
+            return result
+
+        return children, assemble
+
+    def _convert_items(self, items):
+        illegal_chars_action = self.options['illegal_chars_action']
+        name_func = self.options['name_func']
+        translate = self.name_cache.translate
+        result = []
+        for child in items:
+            child_name = translate(child.tag, illegal_chars_action, name_func, namespaces=True)
+            if child_name is not None:
+                result.append((child_name, self._get_map(child, self.options)))
+        return result
+
+    def _get_lazy_map(self, elem, options: dict):
+        if len(elem) == 0:
+            return elem.text
+        return _LazyXmlMap(self, options, elem)
 
     def _get_map(self, elem, options: dict):
         if len(elem) == 0:
@@ -159,8 +2030,9 @@ class XmlSlurperBuilder(AbstractSlurperBuilder):
             result = {}
             illegal_chars_action = options['illegal_chars_action']
             name_func = options['name_func']
+            translate = self.name_cache.translate
             for child in elem:
-                child_name = self._extract_name(strip_namespace(child.tag), illegal_chars_action, name_func)
+                child_name = translate(child.tag, illegal_chars_action, name_func, namespaces=True)
                 if not (child_name is None):
                     child_map = self._get_map(child, options)
                     if child_name in result:
@@ -183,25 +2055,185 @@ class XmlSlurperBuilder(AbstractSlurperBuilder):
             return result
 
 
+class _JsonArrayDecoder:
+    """
+    Incremental decoder for top-level json array (see `JsonSlurper.iterate()`).\n
+    Text is fed chunk by chunk, each call returns the array elements which have been completely read so far.
+    Numbers and literals are taken only when the next separator is read, as they may continue in the next chunk.
+    """
+    _whitespace = re.compile(r'\s*')
+    _START, _FIRST, _VALUE, _SEPARATOR, _FINISHED = range(5)
+
+    def __init__(self):
+        self.buffer = ''
+        self.state = self._START
+        self.decoder = json.JSONDecoder()
+
+    def feed(self, chunk: str, eof: bool = False):
+        buffer = self.buffer + chunk
+        whitespace = self._whitespace
+        items = []
+        pos = 0
+        while True:
+            pos = whitespace.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            c = buffer[pos]
+            state = self.state
+            if state == self._FINISHED:
+                raise ValueError('Extra data after json array at position {}'.format(pos))
+            if state == self._START:
+                if c != '[':
+                    raise ValueError('Json array expected')
+                self.state = self._FIRST
+                pos += 1
+            elif state == self._SEPARATOR or c == ']' and state == self._FIRST:
+                if c == ']':
+                    self.state = self._FINISHED
+                elif c == ',' and state == self._SEPARATOR:
+                    self.state = self._VALUE
+                else:
+                    raise ValueError('Expected "," or "]" in json array at position {}'.format(pos))
+                pos += 1
+            else:
+                try:
+                    item, end = self.decoder.raw_decode(buffer, pos)
+                except ValueError:
+                    if eof:
+                        raise
+                    break
+                if c not in '{["':
+                    # number or literal is complete when followed by separator: `1.` may continue as `1.5`
+                    following = whitespace.match(buffer, end).end()
+                    if not eof and (following == len(buffer) or buffer[following] not in ',]'):
+                        break
+                items.append(item)
+                self.state = self._SEPARATOR
+                pos = end
+        self.buffer = buffer[pos:]
+        if eof and self.state != self._FINISHED:
+            raise ValueError('Unterminated json array')
+        return items
+
+
 class JsonSlurperBuilder(AbstractSlurperBuilder):
+    _backend_kind = 'json'
+
+    @property
+    def slurper_class(self):
+        return JsonSlurper
 
     def fromFile(self):
-        with open(self.file_name, "r", encoding=self.options['file_charset']) as f:
-            return JsonSlurper(self._get_map(json.loads(f.read()), self.options))
+        return self._slurp(self._load_file())
+
+    def _parse_file(self):
+        if self.options.get('mmap'):
+            with _MappedFile(self.file_name) as view:
+                return self._convert(_timed('parse', self.backend.loads_buffer, view, self.options['file_charset']))
+        return self._convert(_timed('parse', self.backend.load_file, self.file_name, self.options['file_charset']))
 
     def fromString(self):
-        return JsonSlurper(self._get_map(json.loads(self.data), self.options))
+        return self._slurp(self._convert(_timed('parse', self.backend.loads, self.data)))
+
+    def fromBuffer(self):
+        return self._slurp(self._convert(_timed('parse', self.backend.loads_buffer, self.data,
+                                                self.options['file_charset'])))
 
     def fromStream(self):
-        return JsonSlurper(self._get_map(json.loads(self.data.read()), self.options))
+        data = self.data.read()
+        if isinstance(data, str):
+            return self._slurp(self._convert(_timed('parse', self.backend.loads, data)))
+        return self._slurp(self._convert(_timed('parse', self.backend.loads_buffer, data,
+                                                self.options['file_charset'])))
+
+    def iterate(self, lines: bool = False, chunk_size: int = 65536):
+        if self.file_name is not None:
+            with open(self.file_name, "r", encoding=self.options['file_charset']) as f:
+                yield from self._iterate(f, lines, chunk_size)
+        else:
+            yield from self._iterate(io.StringIO(self.data) if isinstance(self.data, str) else self.data,
+                                     lines, chunk_size)
+
+    def _iterate(self, stream, lines: bool, chunk_size: int):
+        if lines:
+            for line in stream:
+                if line.strip():
+                    yield JsonSlurper(self._get_map(self.backend.loads(line), self.options))
+            return
+        decoder = _JsonArrayDecoder()
+        while True:
+            chunk = stream.read(chunk_size)
+            for item in decoder.feed(chunk, eof=not chunk):
+                yield JsonSlurper(self._get_map(item, self.options))
+            if not chunk:
+                break
+
+    def _split(self, tree):
+        if isinstance(tree, list):
+            return tree, lambda pairs: [value for name, value in pairs]
+        if not isinstance(tree, dict):
+            return None
+        key = max((key for key, value in tree.items() if isinstance(value, list)), default=None,
+                  key=lambda key: len(tree[key]))
+        if key is None:
+            return None
+        translate = self.name_cache.translate
+        names = [translate(str(child), self.options['illegal_chars_action'], self.options['name_func'])
+                 for child in tree]
+        name = translate(str(key), self.options['illegal_chars_action'], self.options['name_func'])
+        if name is None or names.count(name) != 1:
+            return None  # the array is ignored or merged with other fields
+
+        def assemble(pairs):
+            shell = dict(tree)
+            shell[key] = []
+            result = self._get_map(shell, self.options)
+            result[name] = [value for item_name, value in pairs]
+            return result
+
+        return tree[key], assemble
+
+    def _get_document(self, tree):
+        projection = self.projection
+        if projection is None:
+            return super()._get_document(tree)
+        result = self._get_projected_map(tree, projection.root, projection)
+        if result is _MISSING:
+            return [] if isinstance(tree, list) else {}
+        return result
+
+    def _get_projected_map(self, tree, state, projection):
+        """Converts projected fields of the parsed document, dropped keys are neither translated nor converted"""
+        if state is True:
+            return self._get_map(tree, self.options)
+        if isinstance(tree, dict):
+            result = {}
+            illegal_chars_action = self.options['illegal_chars_action']
+            name_func = self.options['name_func']
+            translate = self.name_cache.translate
+            for child in tree:
+                child_name = translate(str(child), illegal_chars_action, name_func)
+                if child_name is not None:
+                    item_state = state.child(child_name)
+                    if item_state is not None:
+                        child_map = self._get_projected_map(tree[child], item_state, projection)
+                        if child_map is not _MISSING:
+                            _merge_field(result, child_name, child_map)
+        elif isinstance(tree, list):
+            result = [item for item in (self._get_projected_map(item, state, projection) for item in tree)
+                      if item is not _MISSING]
+        else:
+            return tree if projection.keeps_leaf(state) else _MISSING
+        return _MISSING if not result and not state.keeps_leaf else result
 
     def _get_map(self, tree, options: dict):
         if isinstance(tree, dict):
             result = {}
             illegal_chars_action = options['illegal_chars_action']
             name_func = options['name_func']
+            translate = self.name_cache.translate
             for child in tree:
-                child_name = self._extract_name(str(child), illegal_chars_action, name_func)
+                child_name = translate(str(child), illegal_chars_action, name_func)
                 if not (child_name is None):
                     child_map = self._get_map(tree[child], options)
                     if child_name in result:
@@ -222,117 +2254,427 @@ class JsonSlurperBuilder(AbstractSlurperBuilder):
             return tree
 
 
+def _config_parser(**options):
+    """Returns `ConfigParser` which keeps case of option names, `configparser` is imported on first use"""
+    import configparser
+    parser = configparser.ConfigParser(**options)
+    parser.optionxform = str
+    return parser
+
+
 class ConfigSlurperBuilder(AbstractSlurperBuilder):
+    _illegal_chars = ('-', ' ', '.', '/', '#')
+    _illegal_chars_mask = r'[-\.\/#\s]'
+
+    @property
+    def slurper_class(self):
+        return ConfigSlurper
+
+    def _field_name(self, name: str):
+        """Translates section or option name to field name"""
+        return self.name_cache.translate(name, self.options['illegal_chars_action'], self.options['name_func'],
+                                         illegal_chars=self._illegal_chars, illegal_chars_mask=self._illegal_chars_mask)
 
     def fromFile(self):
-        config = configparser.ConfigParser()
-        config.optionxform = str
+        return self._slurp(self._load_file())
+
+    def _parse_file(self):
+        return self._convert(self._read_file())
+
+    def _read_file(self):
+        config = _config_parser()
         with open(self.file_name, "r", encoding=self.options['file_charset']) as f:
-            config.read_file(f)
-        return ConfigSlurper(self._get_map(config, self.options))
+            _timed('parse', config.read_file, f)
+        return config
 
     def fromString(self):
-        config = configparser.ConfigParser()
-        config.optionxform = str
-        config.read_string(self.data)
-        return ConfigSlurper(self._get_map(config, self.options))
+        config = _config_parser()
+        _timed('parse', config.read_string, self.data)
+        return self._slurp(self._convert(config))
 
     def fromStream(self):
-        config = configparser.ConfigParser()
-        config.optionxform = str
-        config.read_file(self.data)
-        return ConfigSlurper(self._get_map(config, self.options))
+        config = _config_parser()
+        _timed('parse', config.read_file, self.data)
+        return self._slurp(self._convert(config))
+
+    def _patch_value(self, value):
+        return value
+
+    def _get_document(self, tree):
+        projection = self.projection
+        if projection is None:
+            return super()._get_document(tree)
+        result = {}
+        for section in tree.sections():
+            # sections are selected by their field names before their options are read and interpolated
+            section_name = self._field_name(section)
+            state = None if section_name is None else Projection.child(projection.root, section_name)
+            if state is not None:
+                section_name, child_map = self._get_section_map(section, self._section_items(tree, section),
+                                                                self.options)
+                child_map = projection.prune(child_map, state)
+                if child_map is not _MISSING:
+                    result[section_name] = child_map
+        return result
 
     def _get_map(self, tree, options: dict):
         result = {}
-        illegal_chars_action = options['illegal_chars_action']
-        name_func = options['name_func']
-        illegal_chars = ('-', ' ', '.', '/', '#')
-        illegal_chars_mask = '[-\.\/#\s]'
         for section in tree.sections():
-            section_name = self._extract_name(section, illegal_chars_action, name_func, illegal_chars=illegal_chars,
-                                              illegal_chars_mask=illegal_chars_mask)
+            section_name, child_map = self._get_section_map(section, self._section_items(tree, section), options)
             if not (section_name is None):
-                child_map = {}
-                options = tree.options(section)
-                for option in options:
-                    option_name = self._extract_name(option, illegal_chars_action, name_func,
-                                                     illegal_chars=illegal_chars, illegal_chars_mask=illegal_chars_mask)
-                    child_map[option_name] = tree.get(section, option)
                 result[section_name] = child_map
         return result
 
+    @staticmethod
+    def _section_items(tree, section: str):
+        """Returns list of (option, value) pairs of the config section, values are interpolated"""
+        return [(option, tree.get(section, option)) for option in tree.options(section)]
+
+    def _get_section_map(self, section: str, items: list, options: dict):
+        illegal_chars_action = options['illegal_chars_action']
+        name_func = options['name_func']
+        illegal_chars = self._illegal_chars
+        illegal_chars_mask = self._illegal_chars_mask
+        translate = self.name_cache.translate
+        section_name = translate(section, illegal_chars_action, name_func, illegal_chars=illegal_chars,
+                                 illegal_chars_mask=illegal_chars_mask)
+        if section_name is None:
+            return None, None
+        child_map = {}
+        for option, value in items:
+            option_name = translate(option, illegal_chars_action, name_func,
+                                    illegal_chars=illegal_chars, illegal_chars_mask=illegal_chars_mask)
+            child_map[option_name] = value
+        return section_name, child_map
+
+    def _update_sections(self, tree, previous: dict):
+        """
+        Converts sections of the parsed config, reusing the `previous` ones whose interpolated options are the same.
+        Returns sections (`section: (items, field name, converted section)`) and names of changed sections
+        """
+        sections = {}
+        changed = []
+        for section in tree.sections():
+            items = self._section_items(tree, section)
+            old = previous.get(section)
+            if old is not None and old[0] == items:
+                sections[section] = old
+            else:
+                sections[section] = (items,) + self._get_section_map(section, items, self.options)
+                changed.append(section)
+        changed.extend(section for section in previous if section not in sections)
+        return sections, changed
+
 
 class XmlSlurper(AbstractSlurper):
     """
-    Object representation for Xml document\n
-    Object can be used for read purposes only - xml modification is not available at all.
+    Object representation for Xml document\n
+    Object can be used for read purposes only - xml modification is not available at all.
+    Illegal characters for json tags are: `-` (hyphen), and `.` (dot).
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, data=None, file_name: str = None, illegal_chars_action: int = Constants.REPLACE_WITH_UNDERSCORES,
+               name_func=None, file_charset: str = "UTF8", lazy: bool = False, materialize: bool = False,
+               name_cache: NameCache = None, cache: SlurpCache = None, backend: str = 'auto',
+               mmap: bool = False, compact: bool = False, types=None, workers: int = None, include=None,
+               exclude=None):
+        """
+        Create python object from the given xml document.\n
+        The method converts each xml-tag to corresponding field and assigns its value.
+
+        **data** (optional) - xml-formatted source: string, bytes-like object, text or binary stream,
+        or ElementTree.Element\n
+        **file_name** (optional) - file name for xml document\n
+        **illegal_chars_action** (default: `REPLACE_WITH_UNDERSCORES`) - action applied to tags whose names contain illegal characters\n
+        **name_func** (optional) - function (or `lambda`) used to convert tag name to field name\n
+        **file_charset** (default: `UTF8`) - source file charset\n
+        **lazy** (default: `False`) - convert each tag only when its field is accessed for the first time\n
+        **materialize** (default: `False`) - build `MaterializedNode` objects with native attributes (see `materialize()`)\n
+        **name_cache** (optional) - `NameCache` used to translate tag names, can be shared between calls\n
+        **cache** (optional) - `SlurpCache` used to store converted documents read by `file_name`\n
+        **backend** (default: `auto`) - parser backend name, `auto` - `stdlib` (`lxml` converts slower, it is used only
+        when selected by name; see `register_backend()`)\n
+        **mmap** (default: `False`) - map the file into memory and parse the mapped buffer directly\n
+        **compact** (default: `False`) - store repeated elements with the same fields column-wise (see `ColumnarList`)\n
+        **types** (optional) - converters of field values by field paths: `{'born.year': int}`, or `auto` (see `TypeSchema`)\n
+        **workers** (optional) - number of processes converting top-level repeated elements in parallel
+        (needs `fork` start method, otherwise the document is converted in the current process)\n
+        **include** (optional) - field paths to build: `['man.name', 'man.born.year']`, other fields are neither
+        translated nor converted (see `Projection`)\n
+        **exclude** (optional) - field paths which are not built
+        """
+        if compact and materialize:
+            raise ValueError('Options [compact] and [materialize] are mutually exclusive')
+        if lazy and (materialize or compact or types or workers or include or exclude):
+            raise ValueError('Option [lazy] can not be combined with [materialize], [compact], [types], [workers], '
+                             '[include] or [exclude]')
+        options = {
+            'illegal_chars_action': illegal_chars_action,
+            'name_func': name_func,
+            'file_charset': file_charset,
+            'lazy': lazy,
+            'materialize': materialize,
+            'name_cache': name_cache,
+            'cache': cache,
+            'backend': backend,
+            'mmap': mmap,
+            'compact': compact,
+            'types': types,
+            'workers': workers,
+            'include': include,
+            'exclude': exclude
+        }
+        builder = XmlSlurperBuilder(data, file_name, options)
+        if file_name is not None:
+            return builder.fromFile()
+        if isinstance(data, str):
+            return builder.fromString()
+        if isinstance(data, _BUFFER_TYPES):
+            return builder.fromBuffer()
+        if isinstance(data, _STREAM_TYPES):
+            return builder.fromStream()
+        if _is_xml_element(data):
+            return builder.fromTree()
+        raise TypeError('Illegal input argument [data]')
+
+    @classmethod
+    async def _aread(cls, reader, chunk_size: int, options: dict):
+        parser = ElementTree.XMLParser()
+        async for chunk in _aread_chunks(reader, chunk_size):
+            parser.feed(chunk)
+        return parser.close()
+
+    @classmethod
+    async def aiterate(cls, reader, path: str = '*/*', chunk_size: int = 65536, **options):
+        """
+        Asynchronously iterate over xml elements matching the given path in asyncio stream (see `iterate()`).\n
+        The stream is fed to incremental parser chunk by chunk, one python object is yielded per matching element.
+
+        **reader** - asyncio stream, e.g. `asyncio.StreamReader`\n
+        **path** (default: `*/*`) - slash-separated tag names from the root to the repeated element, `*` matches any tag\n
+        **chunk_size** (default: `65536`) - number of bytes read from the stream at once\n
+        **options** - `create()` arguments: `illegal_chars_action`, `name_func`
+        """
+        builder = XmlSlurperBuilder(None, None, _default_options(**options))
+        matcher = _XmlPathMatcher(path)
+        parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        async for chunk in _aread_chunks(reader, chunk_size):
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                match = matcher.feed(event, elem)
+                if match is not None:
+                    value = builder._get_map(match, builder.options)
+                    matcher.release(match)
+                    yield XmlSlurper(value)
+        parser.close()
+
+    @classmethod
+    def iterate(cls, file_name: str = None, path: str = '*/*', data=None,
+                illegal_chars_action: int = Constants.REPLACE_WITH_UNDERSCORES, name_func=None, backend: str = 'auto'):
+        """
+        Iterate over xml elements matching the given path without loading the whole document into memory.\n
+        The method yields one python object per matching element; processed elements are discarded.
+
+        **file_name** (optional) - file name for xml document\n
+        **path** (default: `*/*`) - slash-separated tag names from the root to the repeated element, `*` matches any tag\n
+        **data** (optional) - xml-formatted source: string, bytes-like object or stream\n
+        **illegal_chars_action** (default: `REPLACE_WITH_UNDERSCORES`) - action applied to tags whose names contain illegal characters\n
+        **name_func** (optional) - function (or `lambda`) used to convert tag name to field name\n
+        **backend** (default: `auto`) - parser backend name (see `register_backend()`)
+        """
+        options = {
+            'illegal_chars_action': illegal_chars_action,
+            'name_func': name_func,
+            'backend': backend
+        }
+        if file_name is None and data is None:
+            raise TypeError('Illegal input argument [data]')
+        return XmlSlurperBuilder(data, file_name, options).iterate(path)
+
+    @classmethod
+    def build_index(cls, file_name: str, key: str, path: str = '*/*', index_file: str = None):
+        """
+        Build persistent sidecar index of repeated xml elements for random access with `lookup()`.\n
+        The file is scanned in one streaming pass, element offsets are stored by values of their key field.
+
+        **file_name** - file name for xml document\n
+        **key** - attribute name, or slash-separated tag names from the element to the key tag: `surname`, `born/year`\n
+        **path** (default: `*/*`) - slash-separated tag names from the root to the repeated element, `*` matches any tag\n
+        **index_file** (optional) - index file name, default: `file_name` with `.slx` suffix
+        """
+        return SlurpIndex.build(file_name, 'xml', key, path, index_file=index_file)
+
+    @classmethod
+    def lookup(cls, file_name: str, index, key, **options):
+        """
+        Create python object for single xml element found by the index (see `build_index()`).\n
+        Only the element is read and converted; stale index is rebuilt automatically. Raises `KeyError` when
+        there is no element with the given key.
+
+        **file_name** - file name for xml document\n
+        **index** - `SlurpIndex` object or index file name, `None` - default index file name\n
+        **key** - key field value\n
+        **options** - `create()` arguments
+        """
+        index = SlurpIndex._open(file_name, index, 'xml')
+        data = index.read(key)
+        if index.namespaces:
+            data = get_backend('xml', options.get('backend') or 'auto').parse_buffer(data)[0]
+        return cls.create(data, **options)
+
+
+class JsonSlurper(AbstractSlurper):
+    """
+    Object representation for Json document\n
+    Object can be used for read purposes only - json modification is not available at all.
     Illegal characters for json tags are: `-` (hyphen), and `.` (dot).
     """
 
+    __slots__ = ()
+
     @classmethod
     def create(cls, data=None, file_name: str = None, illegal_chars_action: int = Constants.REPLACE_WITH_UNDERSCORES,
-               name_func=None, file_charset: str = "UTF8"):
+               name_func=None, file_charset: str = "UTF8", materialize: bool = False,
+               name_cache: NameCache = None, cache: SlurpCache = None, backend: str = 'auto',
+               mmap: bool = False, compact: bool = False, types=None, workers: int = None, include=None,
+               exclude=None):
         """
-        Create python object from the given xml document.\n
-        The method converts each xml-tag to corresponding field and assigns its value.
+        Create python object from the given json document.\n
+        The method converts each json-tag to corresponding field and assigns its value.
 
-        **data** (optional) - xml-formatted source: string, text stream or ElementTree.Element\n
-        **file_name** (optional) - file name for xml document\n
+        **data** (optional) - json-formatted source: string, bytes-like object, text or binary stream\n
+        **file_name** (optional) - file name for json document\n
         **illegal_chars_action** (default: `REPLACE_WITH_UNDERSCORES`) - action applied to tags whose names contain illegal characters\n
         **name_func** (optional) - function (or `lambda`) used to convert tag name to field name\n
-        **file_charset** (default: `UTF8`) - source file charset
+        **file_charset** (default: `UTF8`) - source file (or bytes-like `data`) charset\n
+        **materialize** (default: `False`) - build `MaterializedNode` objects with native attributes (see `materialize()`)\n
+        **name_cache** (optional) - `NameCache` used to translate tag names, can be shared between calls\n
+        **cache** (optional) - `SlurpCache` used to store converted documents read by `file_name`\n
+        **backend** (default: `auto`) - parser backend name, `auto` - `orjson` if installed, otherwise `stdlib`
+        (see `register_backend()`)\n
+        **mmap** (default: `False`) - map the file into memory and parse the mapped buffer directly\n
+        **compact** (default: `False`) - store repeated elements with the same fields column-wise (see `ColumnarList`)\n
+        **types** (optional) - converters of field values by field paths: `{'born.year': int}`, or `auto` (see `TypeSchema`)\n
+        **workers** (optional) - number of processes converting top-level repeated elements in parallel
+        (needs `fork` start method, otherwise the document is converted in the current process)\n
+        **include** (optional) - field paths to build: `['man.name', 'man.born.year']`, other fields are neither
+        translated nor converted (see `Projection`)\n
+        **exclude** (optional) - field paths which are not built
         """
+        if compact and materialize:
+            raise ValueError('Options [compact] and [materialize] are mutually exclusive')
         options = {
             'illegal_chars_action': illegal_chars_action,
             'name_func': name_func,
-            'file_charset': file_charset
+            'file_charset': file_charset,
+            'materialize': materialize,
+            'name_cache': name_cache,
+            'cache': cache,
+            'backend': backend,
+            'mmap': mmap,
+            'compact': compact,
+            'types': types,
+            'workers': workers,
+            'include': include,
+            'exclude': exclude
         }
-        builder = XmlSlurperBuilder(data, file_name, options)
+        builder = JsonSlurperBuilder(data, file_name, options)
         if file_name is not None:
             return builder.fromFile()
         if isinstance(data, str):
             return builder.fromString()
-        if isinstance(data, _io._TextIOBase):
+        if isinstance(data, _BUFFER_TYPES):
+            return builder.fromBuffer()
+        if isinstance(data, _STREAM_TYPES):
             return builder.fromStream()
-        if isinstance(data, ElementTree.Element):
-            return builder.fromTree()
         raise TypeError('Illegal input argument [data]')
 
+    @classmethod
+    async def aiterate(cls, reader, lines: bool = False, chunk_size: int = 65536, **options):
+        """
+        Asynchronously iterate over records of json document in asyncio stream (see `iterate()`).\n
+        The method yields one python object per element of top-level json array, or per line of JSON Lines document.
 
-class JsonSlurper(AbstractSlurper):
-    """
-    Object representation for Json document\n
-    Object can be used for read purposes only - json modification is not available at all.
-    Illegal characters for json tags are: `-` (hyphen), and `.` (dot).
-    """
+        **reader** - asyncio stream, e.g. `asyncio.StreamReader`\n
+        **lines** (default: `False`) - document is in JSON Lines format (one json value per line)\n
+        **chunk_size** (default: `65536`) - number of bytes read from the stream at once\n
+        **options** - `create()` arguments: `illegal_chars_action`, `name_func`, `file_charset`, `backend`
+        """
+        builder = JsonSlurperBuilder(None, None, _default_options(**options))
+        charset = builder.options['file_charset']
+        if lines:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    yield JsonSlurper(builder._get_map(builder.backend.loads_buffer(line, charset), builder.options))
+            return
+        decoder = _JsonArrayDecoder()
+        text_decoder = codecs.getincrementaldecoder(charset)()
+        async for chunk in _aread_chunks(reader, chunk_size):
+            for item in decoder.feed(text_decoder.decode(chunk)):
+                yield JsonSlurper(builder._get_map(item, builder.options))
+        for item in decoder.feed(text_decoder.decode(b'', final=True), eof=True):
+            yield JsonSlurper(builder._get_map(item, builder.options))
 
     @classmethod
-    def create(cls, data=None, file_name: str = None, illegal_chars_action: int = Constants.REPLACE_WITH_UNDERSCORES,
-               name_func=None, file_charset: str = "UTF8"):
+    def iterate(cls, file_name: str = None, lines: bool = False, data=None,
+                illegal_chars_action: int = Constants.REPLACE_WITH_UNDERSCORES, name_func=None,
+                file_charset: str = "UTF8", chunk_size: int = 65536, backend: str = 'auto'):
         """
-        Create python object from the given json document.\n
-        The method converts each json-tag to corresponding field and assigns its value.
+        Iterate over records of json document without loading the whole document into memory.\n
+        The method yields one python object per element of top-level json array, or per line of JSON Lines document.
 
-        **data** (optional) - json-formatted source: string or text stream\n
         **file_name** (optional) - file name for json document\n
+        **lines** (default: `False`) - document is in JSON Lines format (one json value per line)\n
+        **data** (optional) - json-formatted source: string or text stream\n
         **illegal_chars_action** (default: `REPLACE_WITH_UNDERSCORES`) - action applied to tags whose names contain illegal characters\n
         **name_func** (optional) - function (or `lambda`) used to convert tag name to field name\n
-        **file_charset** (default: `UTF8`) - source file charset
+        **file_charset** (default: `UTF8`) - source file charset\n
+        **chunk_size** (default: `65536`) - number of characters read from the source at once\n
+        **backend** (default: `auto`) - parser backend name for JSON Lines documents (see `register_backend()`)
         """
         options = {
             'illegal_chars_action': illegal_chars_action,
             'name_func': name_func,
-            'file_charset': file_charset
+            'file_charset': file_charset,
+            'backend': backend
         }
-        builder = JsonSlurperBuilder(data, file_name, options)
-        if file_name is not None:
-            return builder.fromFile()
-        if isinstance(data, str):
-            return builder.fromString()
-        if isinstance(data, _io._TextIOBase):
-            return builder.fromStream()
-        raise TypeError('Illegal input argument [data]')
+        if file_name is None and not isinstance(data, (str, _io._TextIOBase)):
+            raise TypeError('Illegal input argument [data]')
+        return JsonSlurperBuilder(data, file_name, options).iterate(lines, chunk_size)
+
+    @classmethod
+    def build_index(cls, file_name: str, key: str, path: str = '', lines: bool = False, index_file: str = None):
+        """
+        Build persistent sidecar index of json array elements for random access with `lookup()`.\n
+        The file (`UTF8`) is scanned in one pass, element offsets are stored by values of their key field.
+
+        **file_name** - file name for json document\n
+        **key** - field name, or slash-separated field names from the element to the key field: `user/id`\n
+        **path** (default: top-level array) - slash-separated field names from the root to the array: `albums`\n
+        **lines** (default: `False`) - document is in JSON Lines format, each line is indexed\n
+        **index_file** (optional) - index file name, default: `file_name` with `.slx` suffix
+        """
+        return SlurpIndex.build(file_name, 'json', key, path, lines, index_file)
+
+    @classmethod
+    def lookup(cls, file_name: str, index, key, **options):
+        """
+        Create python object for single json array element found by the index (see `build_index()`).\n
+        Only the element is read and converted; stale index is rebuilt automatically. Raises `KeyError` when
+        there is no element with the given key.
+
+        **file_name** - file name for json document\n
+        **index** - `SlurpIndex` object or index file name, `None` - default index file name\n
+        **key** - key field value\n
+        **options** - `create()` arguments
+        """
+        return cls.create(SlurpIndex._open(file_name, index, 'json').read(key), **options)
 
 
 class ConfigSlurper(AbstractSlurper):
@@ -342,9 +2684,12 @@ class ConfigSlurper(AbstractSlurper):
     Illegal characters for config parameters are: `-` (hyphen), `.` (dot), ` ` (blank space), `/` (slash), and `#` (sharp).
     """
 
+    __slots__ = ()
+
     @classmethod
     def create(cls, data=None, file_name: str = None, illegal_chars_action: int = Constants.REPLACE_WITH_UNDERSCORES,
-               name_func=None, file_charset: str = "UTF8"):
+               name_func=None, file_charset: str = "UTF8", materialize: bool = False,
+               name_cache: NameCache = None, cache: SlurpCache = None, types=None, include=None, exclude=None):
         """
         Create python object from the given config file.\n
         The method converts each config section and parameter to corresponding field and assigns its value.
@@ -353,12 +2698,24 @@ class ConfigSlurper(AbstractSlurper):
         **file_name** (optional) - file name for config file\n
         **illegal_chars_action** (default: `REPLACE_WITH_UNDERSCORES`) - action applied to parameters whose names contain illegal characters\n
         **name_func** (optional) - function (or `lambda`) used to convert parameter name to field name\n
-        **file_charset** (default: `UTF8`) - source file charset
+        **file_charset** (default: `UTF8`) - source file charset\n
+        **materialize** (default: `False`) - build `MaterializedNode` objects with native attributes (see `materialize()`)\n
+        **name_cache** (optional) - `NameCache` used to translate tag names, can be shared between calls\n
+        **cache** (optional) - `SlurpCache` used to store converted documents read by `file_name`\n
+        **types** (optional) - converters of option values by paths: `{'Database.port': int}`, or `auto` (see `TypeSchema`)\n
+        **include** (optional) - paths of sections and options to build: `['Database.host']` (see `Projection`)\n
+        **exclude** (optional) - paths of sections and options to skip
         """
         options = {
             'illegal_chars_action': illegal_chars_action,
             'name_func': name_func,
-            'file_charset': file_charset
+            'file_charset': file_charset,
+            'materialize': materialize,
+            'name_cache': name_cache,
+            'cache': cache,
+            'types': types,
+            'include': include,
+            'exclude': exclude
         }
         builder = ConfigSlurperBuilder(data, file_name, options)
         if file_name is not None:
@@ -369,6 +2726,1196 @@ class ConfigSlurper(AbstractSlurper):
             return builder.fromStream()
         raise TypeError('Illegal input argument [data]')
 
+    @classmethod
+    async def _aread(cls, reader, chunk_size: int, options: dict):
+        data = await super()._aread(reader, chunk_size, options)
+        return data.decode(options.get('file_charset', "UTF8"))
+
+    @classmethod
+    def watch(cls, file_name: str, interval: float = 1.0,
+              illegal_chars_action: int = Constants.REPLACE_WITH_UNDERSCORES, name_func=None,
+              file_charset: str = "UTF8", on_change=None, start: bool = True):
+        """
+        Create python object for the config file which is reloaded when the file is changed.\n
+        The file size and modification time are polled in background thread; only changed sections are converted
+        again and swapped in atomically, so readers never block and never see partially updated config.
+
+        **file_name** - file name for config file\n
+        **interval** (default: `1.0`) - polling interval in seconds\n
+        **illegal_chars_action** (default: `REPLACE_WITH_UNDERSCORES`) - action applied to parameters whose names contain illegal characters\n
+        **name_func** (optional) - function (or `lambda`) used to convert parameter name to field name\n
+        **file_charset** (default: `UTF8`) - source file charset\n
+        **on_change** (optional) - function called with the list of changed section names after each reload\n
+        **start** (default: `True`) - start polling thread, otherwise call `check()` to reload the file
+        """
+        options = {
+            'illegal_chars_action': illegal_chars_action,
+            'name_func': name_func,
+            'file_charset': file_charset
+        }
+        watcher = ConfigWatcher(ConfigSlurperBuilder(None, file_name, options), interval, on_change)
+        if start:
+            watcher.start()
+        return watcher
+
+    @classmethod
+    def create_layered(cls, file_names: list, env_prefix: str = None, environ=None,
+                       illegal_chars_action: int = Constants.REPLACE_WITH_UNDERSCORES, name_func=None,
+                       file_charset: str = "UTF8", types=None, interval: float = 1.0, on_change=None,
+                       start: bool = False):
+        """
+        Create python object for config merged from several files and environment variables (see `LayeredConfig`).\n
+        Later files override earlier ones option by option, environment variables override all files.
+        Interpolation (`%(domain)s`) is done on the merged config, so options may refer to options of other files.
+
+        **file_names** - config files from the lowest precedence to the highest one: defaults, site, host;
+        missing files are skipped\n
+        **env_prefix** (optional) - prefix of overriding environment variables: `APP_` reads `APP_DATABASE__HOST`
+        as option `host` of section `Database` (names are matched case-insensitively, by file or field names)\n
+        **environ** (optional) - mapping used instead of `os.environ`\n
+        **illegal_chars_action** (default: `REPLACE_WITH_UNDERSCORES`) - action applied to parameters whose names contain illegal characters\n
+        **name_func** (optional) - function (or `lambda`) used to convert parameter name to field name\n
+        **file_charset** (default: `UTF8`) - source file charset\n
+        **types** (optional) - converters of option values by paths: `{'Database.port': int}`, or `auto` (see `TypeSchema`)\n
+        **interval** (default: `1.0`) - polling interval in seconds, when polling thread is started\n
+        **on_change** (optional) - function called with the list of changed field paths after each reload\n
+        **start** (default: `False`) - start polling thread, otherwise call `check()` to reload changed layers
+        """
+        options = {
+            'illegal_chars_action': illegal_chars_action,
+            'name_func': name_func,
+            'file_charset': file_charset,
+            'types': types
+        }
+        config = LayeredConfig(ConfigSlurperBuilder(None, None, options), file_names, env_prefix, environ, interval,
+                               on_change)
+        if start:
+            config.start()
+        return config
+
+
+def _logger():
+    import logging
+    return logging.getLogger('slurpers')
+
+
+class ConfigWatcher(ConfigSlurper):
+    """Config object which follows changes of its file (see `ConfigSlurper.watch()`)"""
+
+    __slots__ = ('_builder', '_interval', '_on_change', '_stat', '_sections', '_lock', '_stopped', '_thread')
+
+    def __init__(self, builder: ConfigSlurperBuilder, interval: float, on_change=None):
+        super().__init__({})
+        self._builder = builder
+        self._interval = interval
+        self._on_change = None
+        self._stat = None
+        self._sections = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.check()
+        self._on_change = on_change
+
+    def check(self):
+        """Reloads the file if its size or modification time has changed, returns list of changed sections"""
+        with self._lock:
+            stat = os.stat(self._builder.file_name)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if signature == self._stat:
+                return []
+            tree = self._builder._read_file()
+            sections, changed = self._builder._update_sections(tree, self._sections)
+            value = {}
+            for items, section_name, child_map in sections.values():
+                if not (section_name is None):
+                    value[section_name] = child_map
+            self._sections = sections
+            self._value = value
+            self._stat = signature
+        self._notify(changed)
+        return changed
+
+    def _notify(self, changed):
+        """Calls `on_change` callback, its errors are logged and don't stop polling"""
+        if changed and self._on_change is not None:
+            try:
+                self._on_change(changed)
+            except Exception:
+                _logger().exception('Config change callback failed for %s', self._builder.file_name)
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                self.check()
+            except Exception as e:
+                # the file may be being replaced or written, keep the current config and try again later
+                _logger().warning('Failed to reload config %s: %s', self._builder.file_name, e)
+
+    def start(self):
+        """Starts background polling thread"""
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='ConfigWatcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops background polling thread"""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class LayeredConfig(ConfigWatcher):
+    """
+    Config merged from several files and environment variables (see `ConfigSlurper.create_layered()`).\n
+    Files are parsed once and kept as raw layers; `check()` parses only the layers whose files have changed,
+    merges the layers again and converts only the sections whose interpolated options have changed.
+    Options are also kept in flattened lookup table: `config.get('Database.host')`.
+    """
+
+    __slots__ = ('_file_names', '_env_prefix', '_environ', '_layers', '_env', '_flat')
+
+    def __init__(self, builder: ConfigSlurperBuilder, file_names: list, env_prefix: str = None, environ=None,
+                 interval: float = 1.0, on_change=None):
+        self._file_names = list(file_names)
+        self._env_prefix = env_prefix
+        self._environ = os.environ if environ is None else environ
+        self._layers = {}
+        self._env = ()
+        self._flat = {}
+        super().__init__(builder, interval, on_change)
+
+    def get(self, path: str, default=None):
+        """Returns value of the option by its field path: `Section.option`"""
+        return self._flat.get(path, default)
+
+    def check(self):
+        """Reloads changed files and environment variables, returns list of changed field paths (`Section.option`)"""
+        with self._lock:
+            layers = {}
+            for file_name in self._file_names:
+                try:
+                    stat = os.stat(file_name)
+                    signature = (stat.st_size, stat.st_mtime_ns)
+                except FileNotFoundError:
+                    signature = None
+                layer = self._layers.get(file_name)
+                if layer is None or layer[0] != signature:
+                    layer = (signature, {} if signature is None else self._read_layer(file_name))
+                layers[file_name] = layer
+            env = self._read_env()
+            if env == self._env and all(layers[file_name] is self._layers.get(file_name) for file_name in layers):
+                return []
+            tree = _config_parser()
+            for file_name in self._file_names:
+                tree.read_dict(layers[file_name][1])
+            self._apply_env(tree, env)
+            sections, changed = self._builder._update_sections(tree, self._sections)
+            types = self._builder.options.get('types')
+            schema = compile_types(types) if types else None
+            flat = dict(self._flat)
+            paths = []
+            for section in changed:
+                old = self._sections.get(section)
+                old_name, old_map = (old[1], old[2]) if old is not None and old[1] is not None else (None, {})
+                new = sections.get(section)
+                new_name, new_map = (new[1], new[2]) if new is not None and new[1] is not None else (None, {})
+                if new_name is not None and schema is not None:
+                    schema.apply({new_name: new_map})
+                for option in old_map:
+                    if new_name != old_name or option not in new_map:
+                        paths.append(old_name + '.' + option)
+                        flat.pop(old_name + '.' + option, None)
+                for option, value in new_map.items():
+                    path = new_name + '.' + option
+                    if flat.get(path, _MISSING) != value:
+                        paths.append(path)
+                    flat[path] = value
+            value = {}
+            for items, section_name, child_map in sections.values():
+                if not (section_name is None):
+                    value[section_name] = child_map
+            self._sections = sections
+            self._layers = layers
+            self._env = env
+            self._flat = flat
+            self._value = value
+        self._notify(paths)
+        return paths
+
+    def _read_layer(self, file_name: str):
+        """Parses config file without interpolation, `DEFAULT` section is kept as a regular one"""
+        parser = _config_parser(interpolation=None, default_section='\0')
+        with open(file_name, "r", encoding=self._builder.options['file_charset']) as f:
+            parser.read_file(f)
+        return {section: dict(parser.items(section)) for section in parser.sections()}
+
+    def _read_env(self):
+        prefix = self._env_prefix
+        if not prefix:
+            return ()
+        return tuple(sorted((name, value) for name, value in self._environ.items() if name.startswith(prefix)))
+
+    def _apply_env(self, tree, env):
+        """Sets options overridden by environment variables, their values are not interpolated"""
+        for name, value in env:
+            section, separator, option = name[len(self._env_prefix):].partition('__')
+            if not (section and separator and option):
+                continue
+            section = self._match(section, [tree.default_section] + tree.sections())
+            if section != tree.default_section and not tree.has_section(section):
+                tree.add_section(section)
+            option = self._match(option, tree.defaults() if section == tree.default_section else tree[section])
+            tree.set(section, option, value.replace('%', '%%'))
+
+    def _match(self, name: str, names):
+        """Returns the name from `names` which is equal to `name` or to its field name ignoring case, or `name`"""
+        folded = name.casefold()
+        for candidate in names:
+            if candidate.casefold() == folded or (self._builder._field_name(candidate) or '').casefold() == folded:
+                return candidate
+        return name
+
+
+_JSON_TOKEN = re.compile(rb'["\[\]{},]')
+_JSON_STRING_END = re.compile(rb'(?:[^"\\]|\\.)*"', re.S)
+_json_decoder = json.JSONDecoder()
+
+
+class SlurpIndex:
+    """
+    Persistent sidecar index of repeated elements in a large xml or json file
+    (see `XmlSlurper.build_index()`, `JsonSlurper.build_index()`).\n
+    The index is built in one streaming pass and maps key field values of the elements to their byte offsets,
+    so single element is read and converted without parsing the whole file. The index remembers file size and
+    modification time, and is rebuilt (and saved again) automatically when the file is changed.
+    """
+    suffix = '.slx'
+    version = 1
+
+    def __init__(self, file_name: str, kind: str, key: str, path: str, lines: bool = False):
+        self.file_name = file_name
+        self.kind = kind
+        self.key = key
+        self.path = path
+        self.lines = lines
+        self.index_file = None
+        self.size = None
+        self.mtime = None
+        self.encoding = None
+        self.namespaces = ()
+        self.offsets = {}
+
+    @classmethod
+    def build(cls, file_name: str, kind: str, key: str, path: str, lines: bool = False, index_file: str = None):
+        """Builds index for the file and saves it to `index_file` (default: file name with `.slx` suffix)"""
+        index = cls(file_name, kind, key, path, lines)
+        index.rebuild()
+        index.save(index_file or file_name + cls.suffix)
+        return index
+
+    @classmethod
+    def load(cls, index_file: str):
+        import pickle
+        with open(index_file, 'rb') as f:
+            state = pickle.load(f)
+        if not isinstance(state, dict) or state.get('version') != cls.version:
+            raise ValueError('Unsupported index file: {}'.format(index_file))
+        index = cls(state['file_name'], state['kind'], state['key'], state['path'], state['lines'])
+        for name in ('size', 'mtime', 'encoding', 'namespaces', 'offsets'):
+            setattr(index, name, state[name])
+        index.index_file = index_file
+        return index
+
+    @classmethod
+    def _open(cls, file_name: str, index, kind: str):
+        if not isinstance(index, SlurpIndex):
+            index = cls.load(index or file_name + cls.suffix)
+            index.file_name = file_name
+        if index.kind != kind:
+            raise ValueError('Index is built for {} file, not for {}'.format(index.kind, kind))
+        return index
+
+    def save(self, index_file: str):
+        import pickle
+        state = {name: getattr(self, name) for name in ('file_name', 'kind', 'key', 'path', 'lines', 'size', 'mtime',
+                                                         'encoding', 'namespaces', 'offsets')}
+        state['version'] = self.version
+        temp_path = '{}.{}.tmp'.format(index_file, os.getpid())
+        with open(temp_path, 'wb') as f:
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, index_file)
+        self.index_file = index_file
+
+    def is_stale(self):
+        """Returns `True` when the file has been changed after the index was built"""
+        stat = os.stat(self.file_name)
+        return stat.st_size != self.size or stat.st_mtime_ns != self.mtime
+
+    def rebuild(self):
+        """Scans the file again, the index file (if any) is not updated"""
+        stat = os.stat(self.file_name)
+        self.offsets = {}
+        if self.kind == 'xml':
+            self._scan_xml()
+        elif self.lines:
+            self._scan_json_lines()
+        else:
+            self._scan_json()
+        self.size, self.mtime = stat.st_size, stat.st_mtime_ns
+
+    def refresh(self):
+        """Rebuilds stale index and saves it to its index file"""
+        if self.is_stale():
+            self.rebuild()
+            if self.index_file is not None:
+                self.save(self.index_file)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, key):
+        return str(key) in self.offsets
+
+    def keys(self):
+        return self.offsets.keys()
+
+    def read(self, key):
+        """Returns source fragment (bytes) of the first element with the given key value, raises `KeyError`"""
+        self.refresh()
+        spans = self.offsets.get(str(key))
+        if not spans:
+            raise KeyError(key)
+        start, end = spans[0]
+        with open(self.file_name, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        if self.kind != 'xml':
+            return data
+        if self.namespaces:
+            attributes = ''.join(' {}="{}"'.format(name, value.replace('&', '&amp;').replace('"', '&quot;'))
+                                 for name, value in self.namespaces)
+            data = ('<slurp-index{}>'.format(attributes)).encode(self.encoding or 'utf-8') + data + \
+                '</slurp-index>'.encode(self.encoding or 'utf-8')
+        if self.encoding and codecs.lookup(self.encoding).name != 'utf-8':
+            data = '<?xml version="1.0" encoding="{}"?>'.format(self.encoding).encode(self.encoding) + data
+        return data
+
+    def _add(self, key, start: int, end: int):
+        if key is not None:
+            self.offsets.setdefault(str(key), []).append((start, end))
+
+    def _scan_xml(self):
+        from xml.parsers import expat
+        path = [part for part in self.path.split('/') if part]
+        key_path = self.key.split('/')
+        depth = len(path)
+        if not depth:
+            raise ValueError('Illegal input argument [path]')
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        names = []
+        ancestors = []  # namespace declarations of the elements above the indexed ones
+        record = None  # [start offset, key value] of the element being read
+        pending = None  # (start offset, key value) of the element whose end is reported by the next event
+        text = None
+
+        def close_pending():
+            nonlocal pending
+            if pending is not None:
+                self._add(pending[1], pending[0], parser.CurrentByteIndex)
+                pending = None
+
+        def start_element(name, attributes):
+            nonlocal record, text
+            close_pending()
+            names.append(name.rpartition(':')[2])
+            level = len(names)
+            if level < depth:
+                ancestors.append([(k, v) for k, v in attributes.items() if k == 'xmlns' or k.startswith('xmlns:')])
+            elif level == depth:
+                if all(p in ('*', n) for p, n in zip(path, names)):
+                    record = [parser.CurrentByteIndex, attributes.get(self.key)]
+                    if not self.namespaces:
+                        self.namespaces = tuple(dict(item for items in ancestors for item in items).items())
+            elif record is not None and record[1] is None and text is None and names[depth:] == key_path:
+                text = []
+
+        def end_element(name):
+            nonlocal record, pending, text
+            close_pending()
+            level = len(names)
+            if text is not None and names[depth:] == key_path:
+                record[1] = ''.join(text)
+                text = None
+            if level == depth and record is not None:
+                pending = tuple(record)
+                record = None
+            elif level < depth:
+                ancestors.pop()
+            names.pop()
+
+        def character_data(data):
+            close_pending()
+            if text is not None:
+                text.append(data)
+
+        def xml_declaration(version, encoding, standalone):
+            self.encoding = encoding
+
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.CharacterDataHandler = character_data
+        parser.XmlDeclHandler = xml_declaration
+        with open(self.file_name, 'rb') as f:
+            parser.ParseFile(f)
+            if pending is not None:
+                self._add(pending[1], pending[0], f.seek(0, os.SEEK_END))
+
+    @staticmethod
+    def _json_value(buffer, start: int, size: int):
+        """Decodes json object or array at `start`, returns it, its end offset and chunk size for the next one"""
+        while True:
+            text = codecs.utf_8_decode(bytes(buffer[start:start + size]), 'strict', False)[0]
+            try:
+                value, end = _json_decoder.raw_decode(text)
+            except ValueError:
+                if start + size >= len(buffer):
+                    raise
+                size *= 2
+                continue
+            end = len(text[:end].encode('utf-8'))
+            return value, start + end, max(1024, end * 2)
+
+    def _json_key(self, value):
+        for name in self.key.split('/'):
+            if not isinstance(value, dict):
+                return None
+            value = value.get(name)
+        return value
+
+    def _scan_json_lines(self):
+        with open(self.file_name, 'rb') as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    self._add(self._json_key(json.loads(line)), offset, offset + len(line))
+                offset += len(line)
+
+    def _scan_json(self):
+        target = [part for part in self.path.split('/') if part]
+        with _MappedFile(self.file_name) as buffer:
+            stack = []  # [True, field name, expecting field name] for objects, [False, is indexed array] for arrays
+            pos = 0
+            size = 1024
+            while True:
+                match = _JSON_TOKEN.search(buffer, pos)
+                if match is None:
+                    break
+                c = match.group()
+                pos = match.end()
+                top = stack[-1] if stack else None
+                if c == b'"':
+                    end = _JSON_STRING_END.match(buffer, pos)
+                    if end is None:
+                        raise ValueError('Unterminated json string at position {}'.format(match.start()))
+                    if top is not None and top[0] and top[2]:
+                        top[1] = json.loads(bytes(buffer[match.start():end.end()]))
+                        top[2] = False
+                    pos = end.end()
+                elif top is not None and not top[0] and top[1] and c in b'{[':
+                    value, pos, size = self._json_value(buffer, match.start(), size)
+                    self._add(self._json_key(value), match.start(), pos)
+                elif c == b'{':
+                    stack.append([True, None, True])
+                elif c == b'[':
+                    indexed = all(entry[0] for entry in stack) and [entry[1] for entry in stack] == target
+                    stack.append([False, indexed])
+                elif c == b',':
+                    if top is not None and top[0]:
+                        top[2] = True
+                elif stack:
+                    stack.pop()
+
+
+_IMAGE_MAGIC = b'SLURPIMG'
+_IMAGE_HEADER = struct.Struct('<cI')
+_IMAGE_INT = struct.Struct('<cq')
+_IMAGE_FLOAT = struct.Struct('<cd')
+_IMAGE_TRAILER = struct.Struct('<QQ8s')
+
+
+_DUMP_MAGIC = b'SLURPMSH'
+"""Header of documents dumped as `marshal` data (see `AbstractSlurper.dump()`)"""
+
+
+def _dump(value, stream, mapped: bool):
+    """Writes the document to binary stream, returns number of written bytes"""
+    if mapped:
+        writer = _ImageWriter(stream)
+        writer.write(value)
+        return writer.position
+    import marshal
+    try:
+        data = marshal.dumps(value)
+    except ValueError:
+        try:
+            data = marshal.dumps(_plain(value))  # compact columns, lazy and attached documents
+        except ValueError:
+            raise TypeError('Document values must be dicts, lists, strings, numbers, booleans or None') from None
+    stream.write(_DUMP_MAGIC)
+    stream.write(data)
+    return len(_DUMP_MAGIC) + len(data)
+
+
+def _load_marshal(data):
+    """Decodes the document dumped as `marshal` data"""
+    import marshal
+    try:
+        return marshal.loads(memoryview(data)[len(_DUMP_MAGIC):])
+    except (EOFError, ValueError, TypeError):
+        raise ValueError('Broken slurped document dump') from None
+
+
+class _ImageWriter:
+    """
+    Writes converted document to the stream in flat binary layout (see `SharedDocument`).\n
+    Nodes are written children first, so the layout is produced in one pass: tag byte and payload per node,
+    containers refer to their children by offsets, dictionary keys are stored once in the key table at the end.
+    Equal strings and numbers are stored once.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+        self.keys = {}
+        self.leaves = {}
+        self.chunks = []
+        self.chunks_size = 0
+        self._write(_IMAGE_MAGIC)
+
+    _chunk_size = 1024 * 1024
+    """Written nodes are passed to the stream in chunks of this size"""
+
+    def _write(self, data: bytes):
+        self.chunks.append(data)
+        self.chunks_size += len(data)
+        self.position += len(data)
+        if self.chunks_size >= self._chunk_size:
+            self._flush()
+
+    def _flush(self):
+        self.stream.write(b''.join(self.chunks))
+        self.chunks = []
+        self.chunks_size = 0
+
+    def write(self, value):
+        """Writes the document, key table and trailer"""
+        root = self._node(value)
+        keys_offset = self.position
+        parts = [_IMAGE_HEADER.pack(b'k', len(self.keys))]
+        for key in self.keys:
+            data = key.encode('utf-8')
+            parts.append(struct.pack('<I', len(data)))
+            parts.append(data)
+        self._write(b''.join(parts))
+        self._write(_IMAGE_TRAILER.pack(keys_offset, root, _IMAGE_MAGIC))
+        self._flush()
+
+    def _key(self, key):
+        key_id = self.keys.get(key)
+        if key_id is None:
+            if not isinstance(key, str):
+                raise TypeError('Field names must be strings, not {!r}'.format(key))
+            key_id = self.keys[key] = len(self.keys)
+        return key_id
+
+    def _node(self, value):
+        value_type = type(value)
+        if value_type is str or value_type is int:  # the most frequent leaves are looked up first
+            offset = self.leaves.get((value_type, value))
+            if offset is not None:
+                return offset
+        elif isinstance(value, dict):
+            items = list(value.items())
+            offsets = [self._node(item) for key, item in items]
+            key_ids = [self._key(key) for key, item in items]
+            offset = self.position
+            self._write(struct.pack('<cI{0}I{0}Q'.format(len(items)), b'd', len(items), *key_ids, *offsets))
+            return offset
+        elif isinstance(value, list) or value_type is ColumnarList:
+            offsets = [self._node(item) for item in value]
+            offset = self.position
+            self._write(struct.pack('<cI{}Q'.format(len(offsets)), b'l', len(offsets), *offsets))
+            return offset
+        elif isinstance(value, float):
+            offset = self.position
+            self._write(_IMAGE_FLOAT.pack(b'f', value))
+            return offset
+        key = (value_type, value)
+        offset = self.leaves.get(key)
+        if offset is not None:
+            return offset
+        offset = self.position
+        if value is None:
+            self._write(b'N')
+        elif value is True or value is False:
+            self._write(b'T' if value else b'F')
+        elif isinstance(value, int):
+            if -2 ** 63 <= value < 2 ** 63:
+                self._write(_IMAGE_INT.pack(b'i', value))
+            else:
+                data = str(value).encode('ascii')
+                self._write(_IMAGE_HEADER.pack(b'I', len(data)) + data)
+        elif isinstance(value, str):
+            data = value.encode('utf-8')
+            self._write(_IMAGE_HEADER.pack(b's', len(data)) + data)
+        else:
+            raise TypeError('Value of type {} can not be stored: {!r}'.format(type(value).__name__, value))
+        self.leaves[key] = offset
+        return offset
+
+
+class _Image:
+    """Reader of the flat binary layout (see `_ImageWriter`), decodes nodes by their offsets"""
+    __slots__ = ('buffer', 'keys', 'root_offset', 'owner')
+
+    def __init__(self, buffer, owner=None):
+        self.buffer = buffer
+        self.owner = owner  # shared memory block or memory map, which must live as long as the buffer is used
+        if len(buffer) < len(_IMAGE_MAGIC) + _IMAGE_TRAILER.size or bytes(buffer[:len(_IMAGE_MAGIC)]) != _IMAGE_MAGIC:
+            raise ValueError('Not a slurped document image')
+        keys_offset, self.root_offset, magic = _IMAGE_TRAILER.unpack_from(buffer, len(buffer) - _IMAGE_TRAILER.size)
+        if magic != _IMAGE_MAGIC:
+            raise ValueError('Not a slurped document image')
+        tag, count = _IMAGE_HEADER.unpack_from(buffer, keys_offset)
+        keys = []
+        pos = keys_offset + _IMAGE_HEADER.size
+        for i in range(count):
+            length = struct.unpack_from('<I', buffer, pos)[0]
+            keys.append(sys.intern(str(buffer[pos + 4:pos + 4 + length], 'utf-8')))
+            pos += 4 + length
+        self.keys = keys
+
+    def root(self):
+        return self.decode(self.root_offset)
+
+    def load(self):
+        """
+        Decodes the whole document into plain dicts and lists.\n
+        Nodes are decoded in the order they are stored, children before their containers, so the layout is scanned
+        once; stored once leaves are decoded once.
+        """
+        buffer = self.buffer
+        keys = self.keys
+        end = _IMAGE_TRAILER.unpack_from(buffer, len(buffer) - _IMAGE_TRAILER.size)[0]  # key table offset
+        unpack_header = _IMAGE_HEADER.unpack_from
+        unpack_int = _IMAGE_INT.unpack_from
+        unpack_float = _IMAGE_FLOAT.unpack_from
+        unpack_from = struct.unpack_from
+        values = {}
+        offset = len(_IMAGE_MAGIC)
+        try:
+            while offset < end:
+                tag = buffer[offset]
+                if tag == 0x73:  # s
+                    length = unpack_header(buffer, offset)[1]
+                    values[offset] = str(buffer[offset + 5:offset + 5 + length], 'utf-8')
+                    offset += 5 + length
+                elif tag == 0x64:  # d
+                    count = unpack_header(buffer, offset)[1]
+                    items = unpack_from('<{0}I{0}Q'.format(count), buffer, offset + 5)
+                    values[offset] = {keys[key_id]: values[item]
+                                      for key_id, item in zip(items[:count], items[count:])}
+                    offset += 5 + 12 * count
+                elif tag == 0x6c:  # l
+                    count = unpack_header(buffer, offset)[1]
+                    items = unpack_from('<{}Q'.format(count), buffer, offset + 5)
+                    values[offset] = [values[item] for item in items]
+                    offset += 5 + 8 * count
+                elif tag == 0x69:  # i
+                    values[offset] = unpack_int(buffer, offset)[1]
+                    offset += 9
+                elif tag == 0x66:  # f
+                    values[offset] = unpack_float(buffer, offset)[1]
+                    offset += 9
+                elif tag == 0x4e or tag == 0x54 or tag == 0x46:  # N, T, F
+                    values[offset] = None if tag == 0x4e else tag == 0x54
+                    offset += 1
+                elif tag == 0x49:  # I
+                    length = unpack_header(buffer, offset)[1]
+                    values[offset] = int(str(buffer[offset + 5:offset + 5 + length], 'ascii'))
+                    offset += 5 + length
+                else:
+                    raise ValueError('Broken slurped document image at offset {}'.format(offset))
+            return values[self.root_offset]
+        except (KeyError, struct.error):
+            raise ValueError('Broken slurped document image at offset {}'.format(offset)) from None
+
+    def decode(self, offset: int):
+        buffer = self.buffer
+        tag = buffer[offset]
+        if tag == 0x73:  # s
+            length = _IMAGE_HEADER.unpack_from(buffer, offset)[1]
+            return str(buffer[offset + 5:offset + 5 + length], 'utf-8')
+        if tag == 0x64:  # d
+            count = _IMAGE_HEADER.unpack_from(buffer, offset)[1]
+            key_ids = struct.unpack_from('<{}I'.format(count), buffer, offset + 5)
+            offsets = struct.unpack_from('<{}Q'.format(count), buffer, offset + 5 + 4 * count)
+            keys = self.keys
+            return _SharedMap(self, [(keys[key_id], item) for key_id, item in zip(key_ids, offsets)])
+        if tag == 0x6c:  # l
+            count = _IMAGE_HEADER.unpack_from(buffer, offset)[1]
+            return _SharedList(self, struct.unpack_from('<{}Q'.format(count), buffer, offset + 5))
+        if tag == 0x69:  # i
+            return _IMAGE_INT.unpack_from(buffer, offset)[1]
+        if tag == 0x66:  # f
+            return _IMAGE_FLOAT.unpack_from(buffer, offset)[1]
+        if tag == 0x4e:  # N
+            return None
+        if tag == 0x54 or tag == 0x46:  # T, F
+            return tag == 0x54
+        if tag == 0x49:  # I
+            length = _IMAGE_HEADER.unpack_from(buffer, offset)[1]
+            return int(str(buffer[offset + 5:offset + 5 + length], 'ascii'))
+        raise ValueError('Broken slurped document image at offset {}'.format(offset))
+
+    @classmethod
+    def attach(cls, name: str = None, file_name: str = None):
+        if file_name is not None:
+            import mmap
+            with open(file_name, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return cls(memoryview(mapped), mapped)
+        if name is None:
+            raise TypeError('Illegal input argument: [name] or [file_name] is required')
+        memory = _open_shared_memory(name)
+        return cls(memory.buf, memory)
+
+
+_created_shared_memory = set()
+"""Names of shared memory blocks created by this process (or by its parent before fork)"""
+
+
+def _open_shared_memory(name: str):
+    """Attaches existing shared memory block, which is not removed when the process exits"""
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # python < 3.13 always registers the block in resource tracker
+        memory = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix' and name not in _created_shared_memory:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(memory._name, 'shared_memory')
+        return memory
+
+
+class _SharedMap(dict):
+    """
+    Dictionary view of the node stored in `SharedDocument` (see `XmlSlurper.attach()`).\n
+    Values are stored as offsets and decoded on access; decoded containers are kept, leaf values are decoded again,
+    so the document data stays in shared memory.
+    """
+    __slots__ = ('_image',)
+
+    def __init__(self, image: _Image, items):
+        super().__init__(items)
+        self._image = image
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if type(value) is int:
+            value = self._image.decode(value)
+            if isinstance(value, (_SharedMap, _SharedList)):
+                dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        value = dict.get(self, key, _MISSING)
+        if value is _MISSING:
+            return default
+        if type(value) is int:
+            value = self._image.decode(value)
+            if isinstance(value, (_SharedMap, _SharedList)):
+                dict.__setitem__(self, key, value)
+        return value
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def copy(self):
+        return dict(self.items())
+
+    def __iter__(self):
+        # overriding the slot makes `dict(m)` and `{**m}` decode values through `__getitem__` instead of raw offsets
+        return dict.__iter__(self)
+
+    def __eq__(self, other):
+        return dict(self.items()) == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class _SharedList(list):
+    """List view of the node stored in `SharedDocument`, items are decoded on access"""
+    __slots__ = ('_image',)
+
+    def __init__(self, image: _Image, offsets):
+        super().__init__(offsets)
+        self._image = image
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        value = list.__getitem__(self, index)
+        if type(value) is int:
+            value = self._image.decode(value)
+            if isinstance(value, (_SharedMap, _SharedList)):
+                list.__setitem__(self, index, value)
+        return value
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other):
+        return list(self) == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class SharedDocument:
+    """
+    Converted document stored once per host in flat read-only binary layout (see `AbstractSlurper.share()`).\n
+    The layout is placed into `multiprocessing.shared_memory` block or into memory-mapped file. Worker processes
+    attach slurper objects to it by block name or file name: `XmlSlurper.attach(name)`, fields are decoded on access.
+    The owner calls `unlink()` (or uses the object as context manager) when the document is not needed anymore.
+    """
+
+    def __init__(self, name: str = None, file_name: str = None, size: int = 0, memory=None):
+        self.name = name
+        self.file_name = file_name
+        self.size = size
+        self._memory = memory
+
+    @classmethod
+    def create(cls, value, name: str = None, file_name: str = None):
+        if file_name is not None:
+            temp_path = '{}.{}.tmp'.format(file_name, os.getpid())
+            with open(temp_path, 'wb') as f:
+                writer = _ImageWriter(f)
+                writer.write(value)
+            os.replace(temp_path, file_name)
+            return cls(file_name=file_name, size=writer.position)
+        from multiprocessing import shared_memory
+        stream = io.BytesIO()
+        _ImageWriter(stream).write(value)
+        data = stream.getbuffer()
+        memory = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+        memory.buf[:len(data)] = data
+        _created_shared_memory.add(memory.name)
+        return cls(name=memory.name, size=len(data), memory=memory)
+
+    def close(self):
+        """Closes shared memory block in this process, attached slurper objects keep working"""
+        if self._memory is not None:
+            self._memory.close()
+            self._memory = None
+
+    def unlink(self):
+        """Removes the shared memory block (or the file); processes which have attached it keep their mappings"""
+        if self.name is not None:
+            memory = self._memory or _open_shared_memory(self.name)
+            memory.unlink()
+        elif self.file_name is not None:
+            os.remove(self.file_name)
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.unlink()
+
+
+_BUILDERS = {
+    'xml': XmlSlurperBuilder,
+    'json': JsonSlurperBuilder,
+    'config': ConfigSlurperBuilder,
+    XmlSlurper: XmlSlurperBuilder,
+    JsonSlurper: JsonSlurperBuilder,
+    ConfigSlurper: ConfigSlurperBuilder
+}
+
+SlurpResult = namedtuple('SlurpResult', ['file_name', 'slurper', 'error'])
+"""Result of `slurp_many()` for single file: either `slurper` or `error` is set"""
+
+
+def _default_options(**options):
+    """Returns builder options: `create()` arguments with default values for the missing ones"""
+    return dict({
+        'illegal_chars_action': Constants.REPLACE_WITH_UNDERSCORES,
+        'name_func': None,
+        'file_charset': "UTF8",
+        'materialize': False
+    }, **options)
+
+
+def _builder_class(kind):
+    if isinstance(kind, type):
+        kind = next((cls for cls in kind.__mro__ if cls in _BUILDERS), kind)
+    try:
+        return _BUILDERS[kind]
+    except (KeyError, TypeError):
+        raise ValueError('Illegal input argument [kind]: {!r}'.format(kind))
+
+
+def _slurp_file(kind, file_name: str, options: dict):
+    return _builder_class(kind)(None, file_name, options)._load_file()
+
+
+def slurp_many(file_names, kind='xml', workers: int = None, ordered: bool = True, **options):
+    """
+    Create python objects for many files at once, files are parsed and converted in parallel processes.\n
+    The method yields `SlurpResult(file_name, slurper, error)` for each file; failed files don't abort the batch.
+
+    **file_names** - iterable of file names\n
+    **kind** (default: `xml`) - document kind: `xml`, `json`, `config`, or slurper class\n
+    **workers** (optional) - number of worker processes (default: number of CPUs), `1` - parse in current process\n
+    **ordered** (default: `True`) - yield results in order of `file_names`, otherwise as soon as they are ready\n
+    **options** - `create()` arguments: `illegal_chars_action`, `name_func`, `file_charset`, `materialize`, `cache`,
+    `backend`, `mmap`, `compact`, `types`, `include`, `exclude`.
+    `name_func` must be picklable (module-level function) when `workers` is not `1`
+    """
+    builder_class = _builder_class(kind)
+    options = _default_options(**options)
+    worker_options = {key: options.get(key) for key in ('illegal_chars_action', 'name_func', 'file_charset', 'cache',
+                                                        'backend', 'mmap', 'include', 'exclude')}
+
+    def result(file_name, value):
+        return SlurpResult(file_name, builder_class(None, file_name, options)._slurp(value), None)
+
+    if workers == 1:
+        for file_name in file_names:
+            try:
+                yield result(file_name, _slurp_file(kind, file_name, worker_options))
+            except Exception as e:
+                yield SlurpResult(file_name, None, e)
+        return
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_slurp_file, kind, file_name, worker_options): file_name
+                   for file_name in file_names}
+        for future in (futures if ordered else as_completed(futures)):
+            file_name = futures[future]
+            try:
+                yield result(file_name, future.result())
+            except Exception as e:
+                yield SlurpResult(file_name, None, e)
+
+
+_KIND_SUFFIXES = {
+    '.xml': 'xml',
+    '.json': 'json',
+    '.jsonl': 'json',
+    '.ndjson': 'json',
+    '.ini': 'config',
+    '.cfg': 'config',
+    '.conf': 'config',
+    '.config': 'config'
+}
+
+_SLURPERS = {
+    'xml': XmlSlurper,
+    'json': JsonSlurper,
+    'config': ConfigSlurper
+}
+
+
+_SECTION_LINE = re.compile(rb'\[[ \t]*[A-Za-z_][^\[\]{}"\r\n]*\][ \t]*(?:\r?\n|$)')
+
+
+def _sniff_kind(data: bytes):
+    """Returns document kind by the first significant character of the document, `[Section]` line starts config"""
+    data = data.lstrip(codecs.BOM_UTF8).lstrip()
+    head = data[:1]
+    if head == b'<':
+        return 'xml'
+    if head == b'{' or head == b'[' and not _SECTION_LINE.match(data):
+        return 'json'
+    return 'config'
+
+
+def _file_kind(file_name: str):
+    """Returns document kind by file name extension or, for unknown extensions, by the file content"""
+    kind = _KIND_SUFFIXES.get(os.path.splitext(file_name)[1].lower())
+    if kind is None:
+        with open(file_name, 'rb') as f:
+            kind = _sniff_kind(f.read(4096))
+    return kind
+
+
+def _iter_selected(selector, file_name: str, kind: str, lines: bool, options: dict):
+    """Yields values of the file matching the selector, JSON Lines files are read record by record"""
+    kind = kind or _file_kind(file_name)
+    if kind == 'json' and (lines or file_name.lower().endswith(('.jsonl', '.ndjson'))):
+        for record in JsonSlurperBuilder(None, file_name, options).iterate(lines=True):
+            yield from selector.select(record._value)
+    else:
+        yield from selector.select(_builder_class(kind)(None, file_name, options)._load_file())
+
+
+def _iter_selected_stdin(selector, kind: str, lines: bool, options: dict):
+    """Yields values of the document read from standard input matching the selector"""
+    stream = sys.stdin.buffer
+    if lines:
+        text = io.TextIOWrapper(stream, encoding=options['file_charset'])
+        for record in JsonSlurperBuilder(text, None, options).iterate(lines=True):
+            yield from selector.select(record._value)
+        return
+    data = stream.read()
+    kind = kind or _sniff_kind(data)
+    if kind == 'config':
+        data = data.decode('utf-8-sig' if options['file_charset'].upper() in ('UTF8', 'UTF-8')
+                           else options['file_charset'])
+    yield from selector.select(_SLURPERS[kind].create(data=data, file_charset=options['file_charset'])._value)
+
+
+def _select_file(expression: str, file_name: str, kind: str, lines: bool, options: dict):
+    """Returns values of the file matching the expression and error message, used by `select --jobs` workers"""
+    try:
+        return list(_iter_selected(compile_selector(expression), file_name, kind, lines, options)), None
+    except Exception as e:
+        return None, '{}: {}'.format(file_name, e)
+
+
+def _select(args):
+    """Runs `select` command, returns number of files which could not be read"""
+    selector = compile_selector(args.expression)
+    kind = None if args.kind == 'auto' else args.kind
+    options = _default_options(file_charset=args.charset)
+    write = sys.stdout.write
+
+    def output(file_name, values):
+        for value in values:
+            if args.with_filename:
+                value = {'file': file_name, 'value': value}
+            write(json.dumps(value, ensure_ascii=False, default=_json_default) + '\n')
+
+    errors = 0
+    file_names = args.files or ['-']
+    if args.jobs != 1 and len(file_names) > 1 and '-' not in file_names:
+        from concurrent.futures import ProcessPoolExecutor
+        from itertools import repeat
+        workers = args.jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_select_file, repeat(args.expression), file_names, repeat(kind),
+                                   repeat(args.lines), repeat(options),
+                                   chunksize=max(1, min(64, len(file_names) // (workers * 4))))
+            for file_name, (values, error) in zip(file_names, results):
+                if error is None:
+                    output(file_name, values)
+                else:
+                    errors += 1
+                    sys.stderr.write('slurpers: {}\n'.format(error))
+        return errors
+    for file_name in file_names:
+        try:
+            if file_name == '-':
+                output(file_name, _iter_selected_stdin(selector, kind, args.lines, options))
+            else:
+                output(file_name, _iter_selected(selector, file_name, kind, args.lines, options))
+        except BrokenPipeError:
+            raise
+        except Exception as e:
+            errors += 1
+            sys.stderr.write('slurpers: {}: {}\n'.format(file_name, e))
+    return errors
+
+
+def main(argv=None):
+    """
+    Command line tool: `python -m slurpers select|index|lookup ...`\n
+    `select` prints values matching the path expression (see `AbstractSlurper.select()`) in many files or standard
+    input as JSON Lines, e.g. `python -m slurpers select 'man[*].name' *.xml --jobs 4`
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog='slurpers', description='Slurpers command line tool')
+    commands = parser.add_subparsers(dest='command')
+    select = command = commands.add_parser('select', help='print values matching path expression as JSON Lines')
+    command.add_argument('expression', help='path expression, e.g. `man[*].name`')
+    command.add_argument('files', nargs='*', help='xml, json or config files, `-` or none - standard input')
+    command.add_argument('--kind', choices=('auto', 'xml', 'json', 'config'), default='auto',
+                         help='document kind (default: by file extension or content)')
+    command.add_argument('--lines', action='store_true',
+                         help='json input is in JSON Lines format (default for `.jsonl` and `.ndjson` files)')
+    command.add_argument('--jobs', type=int, default=1,
+                         help='number of worker processes reading files, `0` - number of CPUs (default: 1)')
+    command.add_argument('--with-filename', action='store_true',
+                         help='print `{"file": ..., "value": ...}` objects instead of bare values')
+    command.add_argument('--charset', default='UTF8',
+                         help='charset of json and config input, xml uses its declared encoding (default: UTF8)')
+    command = commands.add_parser('index', help='build sidecar index of repeated elements of xml or json file')
+    command.add_argument('file_name')
+    command.add_argument('--key', required=True, help='key field of indexed elements')
+    command.add_argument('--path', help='path to indexed elements (default: xml `*/*`, json top-level array)')
+    command.add_argument('--lines', action='store_true', help='json file is in JSON Lines format')
+    command.add_argument('--index', help='index file name (default: file name with `.slx` suffix)')
+    command = commands.add_parser('lookup', help='print element found by sidecar index as json')
+    command.add_argument('file_name')
+    command.add_argument('key')
+    command.add_argument('--index', help='index file name (default: file name with `.slx` suffix)')
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['select']:
+        # options may be placed between the expression and the files, argparse supports it without subparsers only
+        args = select.parse_intermixed_args(argv[1:], argparse.Namespace(command='select'))
+    else:
+        args = parser.parse_args(argv)
+    if args.command == 'select':
+        try:
+            errors = _select(args)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # output consumer (e.g. `head`) has exited, further writes to stdout are discarded
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            parser.exit(1)
+        if errors:
+            parser.exit(1)
+    elif args.command == 'index':
+        if args.file_name.lower().endswith('.xml'):
+            index = XmlSlurper.build_index(args.file_name, args.key, args.path or '*/*', args.index)
+        else:
+            index = JsonSlurper.build_index(args.file_name, args.key, args.path or '', args.lines, args.index)
+        print('{} keys indexed in {}'.format(len(index), index.index_file))
+    elif args.command == 'lookup':
+        index = SlurpIndex.load(args.index or args.file_name + SlurpIndex.suffix)
+        index.file_name = args.file_name
+        slurper_class = XmlSlurper if index.kind == 'xml' else JsonSlurper
+        try:
+            print(json.dumps(slurper_class.lookup(args.file_name, index, args.key)._value, ensure_ascii=False))
+        except KeyError:
+            parser.exit(1, 'Key not found: {}\n'.format(args.key))
+    else:
+        parser.print_help()
+
 
 if __name__ == "__main__":
-    pass
+    main()
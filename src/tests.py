@@ -1,8 +1,21 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
 import unittest
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
 from xml.etree.ElementTree import ParseError
 
+import slurpers
 from slurpers import *
 
 
@@ -38,6 +51,35 @@ class TestSlurperFunctions(unittest.TestCase):
         self.assertEqual('', strip_namespace('{http://localhost:8080}'))
 
 
+class TestNameCache(unittest.TestCase):
+
+    def test_translate(self):
+        cache = NameCache()
+        self.assertEqual('tagOne', cache.translate('{urn:x}tag-one', Constants.STRIP_CAPITALIZE, namespaces=True))
+        self.assertEqual('tag_one', cache.translate('tag-one', Constants.REPLACE_WITH_UNDERSCORES))
+        self.assertIsNone(cache.translate('tag-one', Constants.IGNORE_NAMES))
+        self.assertIsNone(cache.translate('tag-one', Constants.IGNORE_NAMES))
+        self.assertEqual({'hits': 1, 'misses': 3, 'hit_rate': 0.25, 'size': 3, 'max_size': 4096}, cache.stats())
+        self.assertEqual('a_b.c', cache.translate('a-b.c', Constants.REPLACE_WITH_UNDERSCORES, illegal_chars_mask='[-]'))
+        self.assertEqual('a_b_c', cache.translate('a-b.c', Constants.REPLACE_WITH_UNDERSCORES))
+
+    def test_bounded(self):
+        cache = NameCache(max_size=2)
+        for name in ['a', 'b', 'c', 'c']:
+            self.assertEqual(name, cache.translate(name, Constants.STRIP))
+        self.assertEqual(2, cache.stats()['size'])
+        self.assertEqual(4, cache.stats()['misses'])
+
+    def test_shared_cache(self):
+        cache = NameCache()
+        XmlSlurper.create(file_name='testdata/beatles.xml', name_cache=cache)
+        self.assertEqual(6, cache.stats()['misses'])
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', name_cache=cache)
+        self.assertEqual(6, cache.stats()['misses'])
+        self.assertEqual('1942', xml.man[1].born.year)
+        self.assertGreater(cache.stats()['hit_rate'], 0.8)
+
+
 class TestXmlSlurper(unittest.TestCase):
     def test_Beatles(self):
         tree = ElementTree.parse('testdata/beatles.xml')
@@ -159,6 +201,16 @@ class TestXmlSlurper(unittest.TestCase):
         with self.assertRaises(KeyError):
             print(xml.tag3)
 
+    def test_child_wrappers_reused(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml')
+        self.assertIs(xml.man, xml.man)
+        self.assertIs(xml.man[1].born, xml.man[1].born)
+        self.assertIsNot(xml.man[0], xml.man[1])
+        self.assertEqual('1942', xml.man[1].born.year)
+        xml = XmlSlurper.create('<a>' + '<b><c>1</c></b>' * 1000 + '</a>')
+        self.assertEqual(1000, sum(1 for b in xml.b if b.c == '1'))
+        self.assertEqual(1, len(slurpers._object_getattribute(xml.b, '_children')))
+
     def test_attributes(self):
         xml = XmlSlurper.create(file_name='testdata/attributes.xml')
         res = []
@@ -170,6 +222,326 @@ class TestXmlSlurper(unittest.TestCase):
         )
 
 
+class TestLazyXmlSlurper(unittest.TestCase):
+
+    def test_lazy_beatles(self):
+        eager = XmlSlurper.create(file_name='testdata/beatles.xml')
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', lazy=True)
+        self.assertEqual(4, len(xml.man))
+        for i in range(len(eager.man)):
+            self.assertEqual(eager.man[i].surname, xml.man[i].surname)
+            self.assertEqual(eager.man[i].born.year, xml.man[i].born.year)
+        self.assertEqual(str(eager), str(xml))
+
+    def test_lazy_conversion_is_cached(self):
+        xml = XmlSlurper.create("<root><man><born><year>1940</year></born></man><tag-one>1</tag-one></root>",
+                                lazy=True)
+        self.assertNotIsInstance(dict.__getitem__(xml._value, 'man'), (dict, str))
+        self.assertEqual('1940', xml.man.born.year)
+        self.assertIsInstance(dict.__getitem__(xml._value, 'man'), dict)
+        self.assertEqual('1', xml.tag_one)
+
+    def test_lazy_attributes(self):
+        xml = XmlSlurper.create(file_name='testdata/logback.xml', lazy=True)
+        self.assertEqual('STDOUT', xml.appender[0].name)
+        self.assertEqual('INFO', xml.appender[0].filter.level)
+
+
+class TestXmlIterate(unittest.TestCase):
+
+    def test_iterate_file(self):
+        surnames = [man.surname for man in XmlSlurper.iterate('testdata/beatles.xml', path='beatles/man')]
+        self.assertEqual(['Lennon', 'McCartney', 'Starr', 'Harrison'], surnames)
+        years = [born.year for born in XmlSlurper.iterate('testdata/beatles.xml', path='*/man/born')]
+        self.assertEqual(['1940', '1942', '1940', '1943'], years)
+
+    def test_iterate_string(self):
+        items = list(XmlSlurper.iterate(
+            data="<catalog><item><price-value>1</price-value></item><skip><item>0</item></skip>"
+                 "<item><price-value>2</price-value></item></catalog>",
+            path='catalog/item'))
+        self.assertEqual(['1', '2'], [item.price_value for item in items])
+        data = '<?xml version="1.0" encoding="windows-1251"?><a><b>Юрий</b><b>Балалайка</b></a>'.encode('cp1251')
+        for source in (data, bytearray(data), memoryview(data)):
+            self.assertEqual(['Юрий', 'Балалайка'], [str(b) for b in XmlSlurper.iterate(data=source, path='a/b')])
+
+    def test_iterate_namespaces(self):
+        movies = [str(movie) for movie in XmlSlurper.iterate('testdata/test.xml')]
+        self.assertEqual(['the godfather', 'ronin'], movies)
+
+    def test_iterate_releases_elements(self):
+        root = ElementTree.fromstring("<a><b><c>1</c></b><b><c>2</c></b></a>")
+        matcher = slurpers._XmlPathMatcher('a/b')
+        matched = []
+        for event, elem in [('start', root), ('start', root[0]), ('start', root[0][0]), ('end', root[0][0])]:
+            self.assertIsNone(matcher.feed(event, elem))
+        matched.append(matcher.feed('end', root[0]))
+        self.assertIs(root[0], matched[0])
+        matcher.release(matched[0])
+        self.assertEqual(1, len(root))
+
+
+class TestMaterialize(unittest.TestCase):
+
+    def test_materialize_xml(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', materialize=True)
+        self.assertIsInstance(xml, MaterializedNode)
+        self.assertEqual(4, len(xml.man))
+        self.assertEqual('1942', xml.man[1].born.year)
+        self.assertEqual('Starr', xml.man[2]['surname'])
+        self.assertIs(type(xml.man[0]), type(xml.man[1]))
+        self.assertIs(type(xml.man[0].born), type(xml.man[3].born))
+        self.assertFalse(hasattr(xml.man[0].born, '__dict__'))
+        with self.assertRaises(AttributeError):
+            print(xml.man[0].born.month)
+
+    def test_materialize_json_and_config(self):
+        json = JsonSlurper.create(file_name="testdata/baez.json", materialize=True)
+        self.assertEqual(14, json.albums[4].number_of_tracks)
+        config = ConfigSlurper.create(file_name="testdata/google.config", materialize=True)
+        self.assertEqual("admin", config.Admin_page.user_name)
+
+    def test_materialize_illegal_names(self):
+        json = JsonSlurper.create(data='{"a": {"1st": "x", "_hidden": 2}, "b": "y"}', materialize=True)
+        self.assertEqual('y', json.b)
+        self.assertIsInstance(json.a, JsonSlurper)
+        self.assertEqual(2, json.a._hidden)
+        self.assertEqual('x', json.a['1st'])
+
+    def test_materialize_class_cache(self):
+        records = [{'id{}'.format(i): i} for i in range(1500)]
+        doc = JsonSlurper.create(data=json.dumps({'records': records}), materialize=True)
+        self.assertEqual(1499, doc.records[1499].id1499)
+        self.assertLessEqual(len(slurpers._materialized_classes), 1024)
+
+    def test_materialize_lazy(self):
+        with self.assertRaises(ValueError):
+            XmlSlurper.create(file_name='testdata/beatles.xml', lazy=True, materialize=True)
+
+
+class TestSelect(unittest.TestCase):
+
+    def test_select_xml(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml')
+        self.assertEqual(['1940', '1942', '1940', '1943'], xml.select('man[*].born.year'))
+        self.assertEqual(['John', 'Winston', 'James', 'Paul', 'Ringo', 'George'], xml.select('man.name'))
+        self.assertEqual(['James'], xml.select('man[1].name[0]'))
+        self.assertEqual(['Paul', 'Ringo', 'George'], xml.select('man.name[-1]')[1:])
+        self.assertEqual(['1940', '1942', '1940', '1943'], xml.select('..year'))
+        self.assertEqual(['1940'], xml.select('man[surname=Starr].born.year'))
+        self.assertEqual('Liverpool', xml.select('man[surname="Harrison"]')[0].born.place)
+        self.assertEqual(4, len(xml.select('*..place')))
+        self.assertEqual([], xml.select('man.born.month'))
+
+    def test_select_json(self):
+        json = JsonSlurper.create(file_name='testdata/baez.json')
+        self.assertEqual(['Farewell, Angelina'], json.select('albums[year=1965].name'))
+        self.assertEqual([14], json.select('albums[-1].number_of_tracks'))
+        self.assertEqual(5, len(json.select('albums[name]')))
+        self.assertIsInstance(json.select('albums', wrap=False)[0], dict)
+
+    def test_select_lazy(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', lazy=True)
+        self.assertEqual(['1940', '1942', '1940', '1943'], xml.select('man.born.year'))
+
+    def test_compile(self):
+        self.assertIs(compile_selector('man.born'), compile_selector('man.born'))
+        for expression in ['', '.a', 'a.', 'a..', 'a[', 'a]b', '[1]', 'a...b', 'a[=1]']:
+            with self.assertRaises(ValueError):
+                compile_selector(expression)
+
+
+class TestPatch(unittest.TestCase):
+
+    def test_xml_patch(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml')
+        source = xml._value
+        xml.apply_patch([
+            {'op': 'replace', 'path': '/man/1/born/year', 'value': '1943'},
+            {'op': 'add', 'path': '/man/-', 'value': ElementTree.fromstring('<man><first-name>Pete</first-name></man>')},
+            {'op': 'add', 'path': '/man/2/name/-', 'value': 'Richard'},
+            {'op': 'remove', 'path': '/man/0/name/1'}
+        ])
+        self.assertEqual('1943', xml.man[1].born.year)
+        self.assertEqual('1942', source['man'][1]['born']['year'])
+        self.assertEqual('Pete', xml.man[4].first_name)
+        self.assertEqual(['Ringo', 'Richard'], xml.man[2].name._value)
+        self.assertEqual('John', xml.man[0].name)
+        self.assertIs(source['man'][0]['born'], xml._value['man'][0]['born'])
+        self.assertIs(source['man'][3], xml._value['man'][3])
+        xml = XmlSlurper.create('<a><b>1</b></a>').apply_patch([{'op': 'add', 'path': '/b/-', 'value': '2'}])
+        self.assertEqual(['1', '2'], xml.b._value)
+
+    def test_lazy_patch(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', lazy=True)
+        xml.apply_patch([{'op': 'add', 'path': '/band', 'value': 'The Beatles'},
+                         {'op': 'replace', 'path': '/man/1/born/year', 'value': '1943'}])
+        self.assertEqual('The Beatles', xml.band)
+        self.assertEqual('1943', xml.man[1].born.year)
+        self.assertEqual('Liverpool', xml.man[3].born.place)
+        self.assertEqual(['John', 'Winston'], xml.to_dict()['man'][0]['name'])
+        lazy = XmlSlurper.create('<x><y>1</y><z><w>2</w></z></x>', lazy=True)._value
+        self.assertEqual({'y': '1', 'z': {'w': '2'}}, dict(lazy))
+        self.assertEqual({'y': '1', 'z': {'w': '2'}}, lazy.copy())
+
+    def test_json_patch(self):
+        json = JsonSlurper.create('{"a/b": 1, "c": [1, 2], "d": {"e-f": 3}}')
+        json.apply_patch([
+            {'op': 'add', 'path': '/g', 'value': {'h-i': [{'j.k': 1}]}},
+            {'op': 'move', 'from': '/a~1b', 'path': '/c/0'},
+            {'op': 'copy', 'from': '/d', 'path': '/c/-'},
+            {'op': 'test', 'path': '/c', 'value': [1, 1, 2, {'e_f': 3}]},
+            {'op': 'remove', 'path': '/d/e_f'}
+        ])
+        self.assertEqual(1, json.g.h_i[0].j_k)
+        self.assertEqual({'c': [1, 1, 2, {'e_f': 3}], 'd': {}, 'g': {'h_i': [{'j_k': 1}]}}, json._value)
+        json.apply_patch([{'op': 'add', 'path': '/g/user', 'value': {'nick-name': 'x'}}],
+                         illegal_chars_action=Constants.STRIP_CAPITALIZE)
+        self.assertEqual('x', json.g.user.nickName)
+        with self.assertRaises(ValueError):
+            json.apply_patch([{'op': 'remove', 'path': '/c/0'}, {'op': 'test', 'path': '/c/0', 'value': 5}])
+        self.assertEqual([1, 1, 2, {'e_f': 3}], json.c._value)
+        for operation in [{'op': 'remove', 'path': '/x'}, {'op': 'replace', 'path': '/c/4', 'value': 1},
+                          {'op': 'add', 'path': '/c/01', 'value': 1}, {'op': 'add', 'path': 'c', 'value': 1},
+                          {'op': 'move', 'from': '/g', 'path': '/g/x'}, {'op': 'merge', 'path': '/c'}]:
+            with self.assertRaises(ValueError):
+                json.apply_patch([operation])
+
+    def test_config_patch(self):
+        config = ConfigSlurper.create(file_name='testdata/google.config')
+        config.apply_patch([{'op': 'replace', 'path': '/Database/port', 'value': '4321'}])
+        self.assertEqual('4321', config.Database.port)
+        self.assertEqual('root', config.Database.user)
+
+
+class TestCompact(unittest.TestCase):
+
+    def test_compact_xml(self):
+        xml = XmlSlurper.create(file_name='testdata/logback.xml', compact=True)
+        self.assertIsInstance(xml.appender._value, list)  # appenders have different fields
+        data = ''.join('<item id="{0}"><name>n{0}</name><price>{1}</price></item>'.format(i, i * 2) for i in range(5))
+        xml = XmlSlurper.create('<root>' + data + '</root>', compact=True)
+        self.assertIsInstance(xml.item._value, ColumnarList)
+        self.assertEqual(5, len(xml.item))
+        self.assertEqual('n3', xml.item[3].name)
+        self.assertEqual('3', xml.item[3].id)
+        self.assertEqual('8', xml.item[-1].price)
+        self.assertEqual(['0', '2', '4', '6', '8'], xml.item.column('price'))
+        self.assertEqual(['n0', 'n1', 'n2', 'n3', 'n4'], [item.name for item in xml.item])
+        self.assertEqual(['n1', 'n2'], xml.select('item[id=1].name') + xml.select('item[2].name'))
+        self.assertEqual(XmlSlurper.create('<root>' + data + '</root>').item._value, xml.item._value)
+        with self.assertRaises(IndexError):
+            print(xml.item[5])
+        with self.assertRaises(KeyError):
+            xml.item.column('weight')
+
+    def test_compact_json(self):
+        json = JsonSlurper.create(file_name='testdata/baez.json', compact=True)
+        self.assertEqual('array', type(json.albums.column('year')).__name__)
+        self.assertEqual([1959, 1960, 1961, 1964, 1965], list(json.albums.column('year')))
+        self.assertEqual(14, json.albums[4].number_of_tracks)
+        json = JsonSlurper.create('{"a": [{"x": 0.5, "y": true}, {"x": 1.5, "y": false}, {"x": 2.5, "y": null}]}',
+                                  compact=True)
+        self.assertEqual('d', json.a.column('x').typecode)
+        self.assertEqual([True, False, None], json.a.column('y'))
+        self.assertEqual(['a', 'b'], JsonSlurper.create('{"a": [{"x": "a"}, {"x": "b"}]}').a.column('x'))
+
+    def test_compact_options(self):
+        with self.assertRaises(ValueError):
+            XmlSlurper.create(file_name='testdata/beatles.xml', compact=True, lazy=True)
+        with self.assertRaises(ValueError):
+            JsonSlurper.create(file_name='testdata/baez.json', compact=True, materialize=True)
+
+
+class TestTypes(unittest.TestCase):
+
+    def test_types_xml(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', types={'man.born.year': int})
+        self.assertEqual([1940, 1942, 1940, 1943], [man.born.year for man in xml.man])
+        self.assertEqual('Liverpool', xml.man[0].born.place)
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', types={'*.born.*': str.upper}, compact=True)
+        self.assertEqual('LIVERPOOL', xml.man[1].born.place)
+        data = ''.join('<item><price>{}</price><ok>{}</ok></item>'.format(i * 0.5, i % 2 == 0) for i in range(3))
+        xml = XmlSlurper.create('<root>' + data + '</root>', types={'item.price': float, 'item.ok': bool},
+                                compact=True)
+        self.assertEqual('d', xml.item.column('price').typecode)
+        self.assertEqual([True, False, True], [item.ok for item in xml.item])
+
+    def test_types_auto(self):
+        xml = XmlSlurper.create('<a><i>-12</i><f>1.5e3</f><b>True</b><s>007</s><t>x1</t><e/></a>', types='auto')
+        self.assertEqual((-12, 1500.0, True, '007', 'x1', None), (xml.i, xml.f, xml.b, xml.s, xml.t, xml.e))
+        config = ConfigSlurper.create(file_name='testdata/google.config', types='auto')
+        self.assertEqual(1234, config.Database.port)
+        self.assertEqual('root', config.Database.user)
+
+    def test_types_config(self):
+        config = ConfigSlurper.create(file_name='testdata/google.config', types={'*.port': int})
+        self.assertEqual(1234, config.Database.port)
+        self.assertEqual(80, config.Admin_page.port)
+        self.assertEqual('mysql.google.com', config.Database.host)
+
+    def test_types_errors(self):
+        with self.assertRaisesRegex(ValueError, r'man\.name'):
+            XmlSlurper.create(file_name='testdata/beatles.xml', types={'man.name': int})
+        with self.assertRaises(TypeError):
+            JsonSlurper.create(file_name='testdata/baez.json', types={'name': 'int'})
+        with self.assertRaises(ValueError):
+            XmlSlurper.create(file_name='testdata/beatles.xml', types='int')
+        with self.assertRaises(ValueError):
+            XmlSlurper.create(file_name='testdata/beatles.xml', types='auto', lazy=True)
+        self.assertIs(compile_types({'a': int}), compile_types({'a': int}))
+        self.assertIs(compile_types({'a': int}), compile_types([('a', int)]))
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', types=[('man.born.year', int)])
+        self.assertEqual(1942, xml.man[1].born.year)
+
+
+class TestProjection(unittest.TestCase):
+
+    def test_include_xml(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', include=['man.born.year', 'man.name'])
+        self.assertEqual({'name': ['John', 'Winston'], 'born': {'year': '1940'}}, xml.man[0]._value)
+        self.assertEqual('Ringo', xml.man[2].name)
+        self.assertNotIn('surname', xml.man[0]._value)
+        xml = XmlSlurper.create(ElementTree.parse('testdata/beatles.xml').getroot(), include='*.born.year',
+                                types={'man.born.year': int})
+        self.assertEqual([1940, 1942, 1940, 1943], [man.born.year for man in xml.man])
+        self.assertEqual({}, XmlSlurper.create(file_name='testdata/beatles.xml', include=['man.age'])._value)
+
+    def test_exclude(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', include='man', exclude=['man.born.place'])
+        self.assertEqual({'name': 'George', 'surname': 'Harrison', 'born': {'year': '1943'}}, xml.man[3]._value)
+        json = JsonSlurper.create(file_name='testdata/baez.json', exclude=['albums.number_of_tracks', 'born'])
+        self.assertEqual({'name': 'Joan Baez', 'year': 1960}, json.albums[1]._value)
+        self.assertNotIn('born', json._value)
+        config = ConfigSlurper.create(file_name='testdata/google.config', exclude=['*.domain', '*.port'])
+        self.assertEqual({'host', 'database', 'user', 'password'}, set(config.Database._value))
+
+    def test_projection_matches_full_document(self):
+        paths = [(['man.name'], None), (None, ['man.name']), (['*.born'], ['man.born.place']), (['man.*.year'], None)]
+        full = XmlSlurper.create(file_name='testdata/beatles.xml')._value
+        for include, exclude in paths:
+            xml = XmlSlurper.create(file_name='testdata/beatles.xml', include=include, exclude=exclude)
+            self.assertEqual(compile_projection(include, exclude).apply(full), xml._value)
+        json = JsonSlurper.create(file_name='testdata/baez.json', include=['albums.year', 'name'])
+        self.assertEqual(['Joan', [1959, 1960, 1961, 1964, 1965]], [json.name, [album.year for album in json.albums]])
+        json = JsonSlurper.create('[{"a-b": 1, "c": 2}, {"c": 3}]', include=['a_b'])
+        self.assertEqual([{'a_b': 1}], json._value)
+
+    def test_projection_config(self):
+        config = ConfigSlurper.create(file_name='testdata/google.config', include=['Database.host', 'Admin_page'])
+        self.assertEqual({'host': 'mysql.google.com'}, config.Database._value)
+        self.assertEqual('admin', config.Admin_page.user_name)
+        self.assertNotIn('National_Support', config._value)
+
+    def test_projection_errors(self):
+        with self.assertRaises(ValueError):
+            XmlSlurper.create(file_name='testdata/beatles.xml', include=['man'], lazy=True)
+        with self.assertRaises(ValueError):
+            JsonSlurper.create(file_name='testdata/baez.json', include=['albums..name'])
+        self.assertIs(compile_projection(['a.b'], 'c'), compile_projection(['a.b'], ['c']))
+        self.assertIsNone(compile_projection([], None))
+
+
 class TestJsonSlurper(unittest.TestCase):
 
     def test_baez(self):
@@ -203,6 +575,48 @@ class TestJsonSlurper(unittest.TestCase):
             self.assertEqual(18, json.albums[0].numberOfTracks)
 
 
+class TestJsonIterate(unittest.TestCase):
+
+    def test_iterate_array(self):
+        data = '[{"name": "a", "number-of-tracks": 12345}, 17, "s", [1, 2], {"name": "b", "number-of-tracks": 2}]'
+        for chunk_size in (1, 3, 7, 65536):
+            items = list(JsonSlurper.iterate(data=data, chunk_size=chunk_size))
+            self.assertEqual(5, len(items))
+            self.assertEqual(12345, items[0].number_of_tracks)
+            self.assertEqual('17', str(items[1]))
+            self.assertEqual('b', items[4].name)
+
+    def test_iterate_numbers(self):
+        data = '[1.5, 2.25,3, -4e-2, 5E+10 , true, null, "x", 1.0e3]'
+        expected = json.loads(data)
+        for chunk_size in (1, 2, 3, 4, 5, 65536):
+            self.assertEqual(expected, [item._value for item in
+                                        JsonSlurper.iterate(data=io.StringIO(data), chunk_size=chunk_size)])
+        self.assertEqual([], list(JsonSlurper.iterate(data=' [ ] ', chunk_size=1)))
+
+    def test_iterate_separators(self):
+        for data in ('[1 2]', '[1,]', '[,1]', '[1,,2]', '[{"a": 1} {"b": 2}]', '[1]]', '[1.x]'):
+            for chunk_size in (1, 65536):
+                with self.assertRaises(ValueError):
+                    list(JsonSlurper.iterate(data=data, chunk_size=chunk_size))
+
+    def test_iterate_lines(self):
+        data = '{"name": "a"}\n\n{"name": "b"}\n'
+        self.assertEqual(['a', 'b'], [item.name for item in JsonSlurper.iterate(data=data, lines=True)])
+
+    def test_iterate_file(self):
+        with open('testdata/baez.json', 'r') as f:
+            data = '[' + f.read() + ',' + '{"name": "Bob"}]'
+        names = [item.name for item in JsonSlurper.iterate(data=io.StringIO(data), chunk_size=10)]
+        self.assertEqual(['Joan', 'Bob'], names)
+
+    def test_iterate_broken(self):
+        with self.assertRaises(ValueError):
+            list(JsonSlurper.iterate(data='{"name": "a"}'))
+        with self.assertRaises(ValueError):
+            list(JsonSlurper.iterate(data='[{"name": "a"}, {"name"'))
+
+
 class TestCharsets(unittest.TestCase):
 
     def test_charsets_xml(self):
@@ -235,5 +649,672 @@ class TestConfigSlurper(unittest.TestCase):
         self.assertEqual("90", config.Case_support.period_Ndays)
 
 
+class TestConfigWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'app.config')
+        self.write('[Database]\nhost: localhost\n\n[Admin page]\nuser name=admin\n', 0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text, mtime):
+        with open(self.file_name, 'w') as f:
+            f.write(text)
+        os.utime(self.file_name, ns=(mtime, mtime))
+
+    def test_check(self):
+        changes = []
+        config = ConfigSlurper.watch(self.file_name, start=False, on_change=changes.append)
+        self.assertEqual('localhost', config.Database.host)
+        admin = config._value['Admin_page']
+        self.assertEqual([], config.check())
+        self.write('[Database]\nhost: db.local\n\n[Admin page]\nuser name=admin\n\n[New]\nkey=1\n', 10 ** 9)
+        self.assertEqual(['Database', 'New'], config.check())
+        self.assertEqual('db.local', config.Database.host)
+        self.assertEqual('1', config.New.key)
+        self.assertIs(admin, config._value['Admin_page'])
+        self.write('[Admin page]\nuser name=root\n', 2 * 10 ** 9)
+        self.assertEqual(['Admin page', 'Database', 'New'], config.check())
+        self.assertEqual('root', config.Admin_page.user_name)
+        with self.assertRaises(KeyError):
+            print(config.Database)
+        self.assertEqual([['Database', 'New'], ['Admin page', 'Database', 'New']], changes)
+
+    def test_background_thread(self):
+        with ConfigSlurper.watch(self.file_name, interval=0.01) as config:
+            self.write('[Database]\nhost: db.local\n', 10 ** 9)
+            for i in range(500):
+                if config.Database.host == 'db.local':
+                    break
+                time.sleep(0.01)
+            self.assertEqual('db.local', config.Database.host)
+
+    def test_background_errors(self):
+        def fail(changed):
+            raise RuntimeError('callback')
+
+        def wait(condition):
+            for i in range(500):
+                if condition():
+                    break
+                time.sleep(0.01)
+            self.assertTrue(condition())
+
+        with self.assertLogs('slurpers', 'WARNING') as logs:
+            with ConfigSlurper.watch(self.file_name, interval=0.01, on_change=fail) as config:
+                with open(self.file_name, 'wb') as f:
+                    f.write('[Database]\nhost: é'.encode('utf-8')[:-1])
+                os.utime(self.file_name, ns=(10 ** 9, 10 ** 9))
+                wait(lambda: any('Failed to reload' in line for line in logs.output))
+                self.write('[Database]\nhost: db.local\n', 2 * 10 ** 9)
+                wait(lambda: config.Database.host == 'db.local')
+                wait(lambda: any('callback failed' in line for line in logs.output))
+                self.write('[Database]\nhost: db2.local\n', 3 * 10 ** 9)
+                wait(lambda: config.Database.host == 'db2.local')
+
+
+class TestLayeredConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.defaults = self.write('defaults.config', '[DEFAULT]\ndomain: example.com\n\n'
+                                   '[Database]\nhost: db.%(domain)s\nport: 5432\n\n[Admin page]\nuser name=admin\n', 0)
+        self.site = self.write('site.config', '[DEFAULT]\ndomain: site.org\n\n[Database]\nport: 6543\n', 0)
+        self.host = os.path.join(self.directory, 'host.config')
+
+    def write(self, name, text, mtime):
+        file_name = os.path.join(self.directory, name)
+        with open(file_name, 'w') as f:
+            f.write(text)
+        os.utime(file_name, ns=(mtime, mtime))
+        return file_name
+
+    def test_merge(self):
+        environ = {'APP_ADMIN_PAGE__USER_NAME': 'root', 'APP_database__password': '100%', 'HOME': '/root'}
+        config = ConfigSlurper.create_layered([self.defaults, self.site, self.host], env_prefix='APP_',
+                                              environ=environ, types={'Database.port': int})
+        self.assertEqual('db.site.org', config.Database.host)
+        self.assertEqual(6543, config.get('Database.port'))
+        self.assertEqual('root', config.get('Admin_page.user_name'))
+        self.assertEqual('100%', config.Database.password)
+        self.assertIsNone(config.get('Database.user'))
+        self.assertEqual({'user_name': 'root', 'domain': 'site.org'}, config.Admin_page._value)
+
+    def test_check(self):
+        changes = []
+        environ = {}
+        config = ConfigSlurper.create_layered([self.defaults, self.site, self.host], env_prefix='APP_',
+                                              environ=environ, on_change=changes.append)
+        admin = config._value['Admin_page']
+        self.assertEqual([], config.check())
+        self.write('host.config', '[Database]\nhost: localhost\n', 10 ** 9)
+        self.assertEqual(['Database.host'], config.check())
+        self.assertEqual('localhost', config.get('Database.host'))
+        self.assertIs(admin, config._value['Admin_page'])
+        self.write('site.config', '[DEFAULT]\ndomain: site.org\n', 10 ** 9)
+        environ['APP_NEW__KEY'] = '1'
+        self.assertEqual(['Database.port', 'NEW.KEY', 'NEW.domain'], config.check())
+        self.assertEqual('5432', config.Database.port)
+        self.assertEqual('1', config.get('NEW.KEY'))
+        os.remove(self.host)
+        self.assertEqual(['Database.host'], config.check())
+        self.assertEqual('db.site.org', config.Database.host)
+        self.assertEqual([['Database.host'], ['Database.port', 'NEW.KEY', 'NEW.domain'], ['Database.host']], changes)
+
+
+class TestBackends(unittest.TestCase):
+    xml_files = ['attributes.xml', 'balalaika.xml', 'beatles.xml', 'cdata.xml', 'logback.xml', 'singletag.xml',
+                 'tags-illegals.xml', 'test.xml', 'test1.xml', 'test2.xml']
+    json_files = [('baez.json', 'UTF8'), ('balalaika.json', 'windows-1251')]
+
+    def test_xml_parity(self):
+        backends = available_backends('xml')
+        self.assertIn('stdlib', backends)
+        for file_name in self.xml_files:
+            expected = XmlSlurper.create(file_name='testdata/' + file_name, backend='stdlib')._value
+            with open('testdata/' + file_name, 'rb') as f:
+                data = f.read()
+            for backend in backends:
+                for action in (Constants.REPLACE_WITH_UNDERSCORES, Constants.STRIP_CAPITALIZE):
+                    self.assertEqual(
+                        XmlSlurper.create(file_name='testdata/' + file_name, backend='stdlib',
+                                          illegal_chars_action=action)._value,
+                        XmlSlurper.create(file_name='testdata/' + file_name, backend=backend,
+                                          illegal_chars_action=action)._value)
+                if file_name != 'balalaika.xml':
+                    self.assertEqual(expected, XmlSlurper.create(data.decode('utf-8'), backend=backend)._value)
+                self.assertEqual(
+                    [item._value for item in XmlSlurper.iterate('testdata/' + file_name, backend='stdlib')],
+                    [item._value for item in XmlSlurper.iterate('testdata/' + file_name, backend=backend)])
+
+    def test_json_parity(self):
+        backends = available_backends('json')
+        self.assertIn('stdlib', backends)
+        for file_name, charset in self.json_files:
+            expected = JsonSlurper.create(file_name='testdata/' + file_name, file_charset=charset,
+                                          backend='stdlib')._value
+            for backend in backends:
+                self.assertEqual(expected, JsonSlurper.create(file_name='testdata/' + file_name, file_charset=charset,
+                                                              backend=backend)._value)
+        documents = ['{"a-b": [1, 2.5, true, null, {"c.d": "\\u0439"}], "a_b": 1}',
+                     '{"big": 123456789012345678901234567890, "min": -9223372036854775809, "id": "12345678901234567890"}',
+                     '{"nan": NaN, "inf": [Infinity, -Infinity], "huge": 1e400, "s": "\\ud800"}']
+        for data in documents:
+            expected = repr(JsonSlurper.create(data, backend='stdlib')._value)
+            for backend in backends:
+                self.assertEqual(expected, repr(JsonSlurper.create(data, backend=backend)._value))
+                self.assertEqual(expected, repr(JsonSlurper.create(data.encode('utf-8'), backend=backend)._value))
+                self.assertEqual([expected], [repr(item._value) for item in
+                                              JsonSlurper.iterate(data=data, lines=True, backend=backend)])
+        with self.assertRaises(ValueError):
+            JsonSlurper.create('{"a": 1', backend='orjson' if 'orjson' in backends else 'stdlib')
+
+    @unittest.skipUnless('lxml' in available_backends('xml'), 'lxml is not installed')
+    def test_lxml(self):
+        from lxml import etree
+        xml = XmlSlurper.create(etree.fromstring('<root><!-- c --><?pi x?><a>1</a><a>2</a></root>'))
+        self.assertEqual(['1', '2'], xml.select('a'))
+        xml = XmlSlurper.create('<?xml version="1.0" encoding="windows-1251"?><a><b>Юрий</b></a>', backend='lxml',
+                                lazy=True)
+        self.assertEqual('Юрий', xml.b)
+
+    def test_registry(self):
+        class UpperJsonBackend(JsonBackend):
+            name = 'upper'
+
+            def loads(self, data):
+                return json.loads(data.upper())
+
+        class MissingBackend(JsonBackend):
+            def __init__(self):
+                raise ImportError('missing')
+
+        backends = dict(slurpers._backends['json'])
+        self.addCleanup(slurpers._backends.__setitem__, 'json', backends)
+        register_backend('json', 'upper', UpperJsonBackend)
+        register_backend('json', 'missing', MissingBackend, preferred=True)
+        self.assertEqual('A', JsonSlurper.create('{"name": "a"}', backend='upper').NAME)
+        self.assertNotIn('missing', available_backends('json'))
+        self.assertNotEqual('missing', get_backend('json').name)
+        with self.assertRaises(ValueError):
+            get_backend('json', 'missing')
+        with self.assertRaises(ValueError):
+            get_backend('json', 'unknown')
+
+
+class TestBinaryInputs(unittest.TestCase):
+
+    def test_xml_buffers(self):
+        with open('testdata/balalaika.xml', 'rb') as f:
+            data = f.read()
+        for backend in available_backends('xml'):
+            for source in (data, bytearray(data), memoryview(data), io.BytesIO(data)):
+                xml = XmlSlurper.create(source, backend=backend)
+                self.assertEqual("Гагарин", xml.spaceman[0].surname)
+            xml = XmlSlurper.create(file_name='testdata/balalaika.xml', mmap=True, backend=backend)
+            self.assertEqual("Гагарин", xml.spaceman[0].surname)
+            with open('testdata/beatles.xml', 'rb') as f:
+                self.assertEqual(4, len(XmlSlurper.create(f, backend=backend).man))
+
+    def test_json_buffers(self):
+        with open('testdata/baez.json', 'rb') as f:
+            data = f.read()
+        for backend in available_backends('json'):
+            for source in (data, bytearray(data), memoryview(data), io.BytesIO(data)):
+                json = JsonSlurper.create(source, backend=backend)
+                self.assertEqual(18, json.albums[0].number_of_tracks)
+            json = JsonSlurper.create(file_name='testdata/baez.json', mmap=True, backend=backend)
+            self.assertEqual("Joan", json.name)
+            json = JsonSlurper.create(file_name='testdata/balalaika.json', file_charset="windows-1251", mmap=True,
+                                      backend=backend)
+            self.assertEqual("Юрий", json.spacemans[0].name)
+            with open('testdata/balalaika.json', 'rb') as f:
+                json = JsonSlurper.create(f, file_charset="windows-1251", backend=backend)
+                self.assertEqual("Юрий", json.spacemans[0].name)
+
+    def test_empty_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(directory, 'empty.json')
+            open(file_name, 'w').close()
+            with self.assertRaises(ValueError):
+                JsonSlurper.create(file_name=file_name, mmap=True)
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestAsync(unittest.TestCase):
+
+    @staticmethod
+    def run_with_stream(data: bytes, func):
+        async def main():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return await func(reader)
+
+        return asyncio.run(main())
+
+    @staticmethod
+    async def collect(iterator):
+        return [item async for item in iterator]
+
+    def test_acreate(self):
+        with open('testdata/beatles.xml', 'rb') as f:
+            xml = self.run_with_stream(f.read(), lambda r: XmlSlurper.acreate(r, chunk_size=10, materialize=True))
+        self.assertEqual('1942', xml.man[1].born.year)
+        with open('testdata/baez.json', 'rb') as f:
+            json = self.run_with_stream(f.read(), lambda r: JsonSlurper.acreate(
+                r, illegal_chars_action=Constants.STRIP_CAPITALIZE))
+        self.assertEqual(14, json.albums[4].numberOfTracks)
+        with open('testdata/google.config', 'rb') as f:
+            config = self.run_with_stream(f.read(), lambda r: ConfigSlurper.acreate(r))
+        self.assertEqual("Балалайка", config.National_Support.random_word)
+        config = asyncio.run(ConfigSlurper.acreate(file_name='testdata/google.config'))
+        self.assertEqual("admin", config.Admin_page.user_name)
+
+    def test_aiterate(self):
+        with open('testdata/beatles.xml', 'rb') as f:
+            men = self.run_with_stream(f.read(), lambda r: self.collect(
+                XmlSlurper.aiterate(r, path='beatles/man', chunk_size=7)))
+        self.assertEqual(['Lennon', 'McCartney', 'Starr', 'Harrison'], [man.surname for man in men])
+        data = '[{"name": "Юрий"}, {"name": "b"}, 12345]'.encode('utf-8')
+        items = self.run_with_stream(data, lambda r: self.collect(JsonSlurper.aiterate(r, chunk_size=3)))
+        self.assertEqual(['Юрий', 'b', '12345'], [str(item) if i == 2 else item.name for i, item in enumerate(items)])
+        data = b'{"name": "a"}\n\n{"name": "b"}'
+        items = self.run_with_stream(data, lambda r: self.collect(JsonSlurper.aiterate(r, lines=True)))
+        self.assertEqual(['a', 'b'], [item.name for item in items])
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_report(self):
+        with Profiler() as profiler:
+            xml = XmlSlurper.create(file_name='testdata/beatles.xml', types={'man.born.year': int})
+            self.assertEqual(1942, xml.man[1].born.year)
+            ConfigSlurper.create(file_name='testdata/google.config')
+        report = profiler.report()
+        self.assertEqual({'parse', 'convert', 'translate', 'types'}, set(report['timings']))
+        self.assertEqual(2, report['timings']['parse']['calls'])
+        counters = report['counters']
+        self.assertEqual(2, counters['documents'])
+        self.assertEqual(3, counters['wrappers'])  # man, man[1], born
+        self.assertGreater(counters['names'], counters['name_cache_hits'])
+        self.assertGreater(counters['nodes'], counters['names'])
+        XmlSlurper.create(file_name='testdata/beatles.xml')
+        self.assertEqual(2, profiler.report()['counters']['documents'])
+
+    def test_sinks(self):
+        metrics = {}
+        with Profiler(sink=metrics.__setitem__, prefix='app') as outer:
+            with Profiler() as inner:
+                JsonSlurper.create(file_name='testdata/baez.json')
+            JsonSlurper.create(file_name='testdata/baez.json', compact=True)
+        self.assertEqual(1, inner.report()['counters']['documents'])
+        self.assertEqual(1, metrics['app.documents'])
+        self.assertEqual(1, metrics['app.compact.calls'])
+        self.assertIn('app.parse.seconds', metrics)
+        with self.assertLogs('slurpers', 'INFO') as logs:
+            with Profiler(sink=logging.getLogger('slurpers')):
+                ConfigSlurper.create(file_name='testdata/google.config')
+        self.assertIn('INFO:slurpers:slurpers.documents=1', logs.output)
+        self.assertEqual(dict(outer.metrics()), metrics)
+
+
+class TestSlurpMany(unittest.TestCase):
+    files = ['testdata/beatles.xml', 'testdata/missing.xml', 'testdata/attributes.xml', 'testdata/logback.xml']
+
+    def check_results(self, results):
+        self.assertEqual(self.files, [result.file_name for result in results])
+        self.assertEqual('Starr', results[0].slurper.man[2].surname)
+        self.assertIsNone(results[1].slurper)
+        self.assertIsInstance(results[1].error, OSError)
+        self.assertEqual('Spain', results[2].slurper.country[1].name)
+        self.assertEqual(2, len(results[3].slurper.appender))
+
+    def test_slurp_many_processes(self):
+        self.check_results(list(slurp_many(self.files, workers=2)))
+        unordered = list(slurp_many(self.files, workers=2, ordered=False))
+        self.assertEqual(sorted(self.files), sorted(result.file_name for result in unordered))
+
+    def test_slurp_many_in_process(self):
+        self.check_results(list(slurp_many(self.files, workers=1)))
+
+    def test_slurp_many_options(self):
+        results = list(slurp_many(['testdata/baez.json'], kind=JsonSlurper, workers=2,
+                                  illegal_chars_action=Constants.STRIP_CAPITALIZE, materialize=True))
+        self.assertIsInstance(results[0].slurper, MaterializedNode)
+        self.assertEqual(14, results[0].slurper.albums[4].numberOfTracks)
+        results = list(slurp_many(['testdata/beatles.xml'], workers=1, include=['man.surname']))
+        self.assertEqual({'surname': 'Starr'}, results[0].slurper.man[2]._value)
+        results = list(slurp_many(['testdata/google.config'], kind='config', workers=1))
+        self.assertEqual("admin", results[0].slurper.Admin_page.user_name)
+        with self.assertRaises(ValueError):
+            list(slurp_many(['testdata/baez.json'], kind='yaml'))
+
+
+def _attached_fields(name):
+    xml = XmlSlurper.attach(name)
+    return xml.man[1].born.year, xml.select('man.surname')
+
+
+class TestSharedDocument(unittest.TestCase):
+
+    def test_shared_memory(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml')
+        with xml.share() as document:
+            shared = XmlSlurper.attach(document.name)
+            self.assertEqual(xml._value, shared._value)
+            self.assertEqual(['John', 'Winston'], shared.man[0].name._value)
+            self.assertEqual('Liverpool', shared.man[3].born.place)
+            self.assertIs(shared.man[2], shared.man[2])
+            self.assertEqual(4, len(shared.man))
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(_attached_fields, [document.name] * 2))
+            self.assertEqual([('1942', ['Lennon', 'McCartney', 'Starr', 'Harrison'])] * 2, results)
+
+    def test_patch_attached(self):
+        with XmlSlurper.create('<a><x><y>1</y></x><v>2</v></a>').share() as document:
+            shared = XmlSlurper.attach(document.name)
+            raw = shared._value
+            self.assertEqual({'x': {'y': '1'}, 'v': '2'}, dict(raw))
+            self.assertEqual({'x': {'y': '1'}, 'v': '2'}, {**raw})
+            self.assertEqual({'x': {'y': '1'}, 'v': '2'}, raw.copy())
+            shared.apply_patch([{'op': 'add', 'path': '/z', 'value': 'Z'},
+                                {'op': 'replace', 'path': '/x/y', 'value': '3'}])
+            self.assertEqual('Z', shared.z)
+            self.assertEqual('3', shared.x.y)
+            self.assertEqual('2', shared.v)
+            self.assertEqual({'x': {'y': '3'}, 'v': '2', 'z': 'Z'}, shared.to_dict())
+            self.assertEqual('1', XmlSlurper.attach(document.name).x.y)
+
+    def test_shared_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        file_name = os.path.join(directory, 'baez.img')
+        value = {'a': [1, -2 ** 70, 2.5, True, False, None, '', 'Балалайка'], 'b': {}, 'c': [], 'd': 'Балалайка'}
+        JsonSlurper.create(json.dumps(value)).share(file_name=file_name)
+        shared = JsonSlurper.attach(file_name=file_name)
+        self.assertEqual(value, shared._value)
+        self.assertEqual([True, False], shared.a[3:5]._value)
+        JsonSlurper.create(file_name='testdata/baez.json', compact=True).share(file_name=file_name)
+        self.assertEqual(14, JsonSlurper.attach(file_name=file_name).albums[4].number_of_tracks)
+        with self.assertRaises(TypeError):
+            XmlSlurper.create('<a><b>1</b></a>', types={'b': complex}).share(file_name=file_name)
+        with self.assertRaises(ValueError):
+            XmlSlurper.attach(file_name='testdata/beatles.xml')
+
+
+class TestSerialization(unittest.TestCase):
+
+    def test_to_dict(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml')
+        value = xml.to_dict()
+        self.assertEqual(xml._value, value)
+        value['man'][0]['born']['year'] = '1900'
+        self.assertEqual('1940', xml.man[0].born.year)
+        self.assertEqual({'name': 'Ringo', 'surname': 'Starr', 'born': {'place': 'Liverpool', 'year': '1940'}},
+                         xml.man[2].to_dict())
+        compact = JsonSlurper.create(file_name='testdata/baez.json', compact=True)
+        self.assertEqual(JsonSlurper.create(file_name='testdata/baez.json')._value, compact.to_dict())
+        self.assertIs(list, type(compact.to_dict()['albums']))
+
+    def test_to_json(self):
+        for slurper in [XmlSlurper.create(file_name='testdata/beatles.xml'),
+                        JsonSlurper.create('[1, {"a": [2, {"b": "Балалайка"}]}, []]'),
+                        JsonSlurper.create(file_name='testdata/baez.json', compact=True)]:
+            text = slurper.to_json()
+            self.assertEqual(slurper.to_dict(), json.loads(text))
+            stream = io.StringIO()
+            self.assertIsNone(slurper.to_json(stream))
+            self.assertEqual(text, stream.getvalue())
+        stream = io.StringIO()
+        JsonSlurper.create('{"a": ["Балалайка"]}').to_json(stream, ensure_ascii=False, indent=1)
+        self.assertEqual('{\n "a": [\n  "Балалайка"\n ]\n}', stream.getvalue())
+
+    def test_dump_load(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        file_name = os.path.join(directory, 'beatles.slurp')
+        mapped_file_name = os.path.join(directory, 'beatles.img')
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', types={'man.born.year': int})
+        size = xml.dump(file_name)
+        self.assertEqual(os.path.getsize(file_name), size)
+        self.assertEqual(xml.dump(mapped_file_name, mapped=True), os.path.getsize(mapped_file_name))
+        for loaded in [XmlSlurper.load(file_name=file_name), XmlSlurper.load(file_name=mapped_file_name),
+                       XmlSlurper.load(file_name=mapped_file_name, lazy=True)]:
+            self.assertEqual(xml._value, loaded._value)
+            self.assertEqual(1942, loaded.man[1].born.year)
+            self.assertEqual(xml.to_json(), loaded.to_json())
+        with self.assertRaises(ValueError):
+            XmlSlurper.load(file_name=file_name, lazy=True)
+        value = {'a': [1, -2 ** 70, 2.5, True, False, None, '', 'Балалайка'], 'b': {}, 'c': []}
+        for mapped in (False, True):
+            stream = io.BytesIO()
+            JsonSlurper.create(json.dumps(value)).dump(stream, mapped=mapped)
+            self.assertEqual(value, JsonSlurper.load(stream.getvalue())._value)
+            stream.seek(0)
+            self.assertEqual(value, JsonSlurper.load(stream).to_dict())
+        compact = JsonSlurper.create(file_name='testdata/baez.json', compact=True)
+        stream = io.BytesIO()
+        compact.dump(stream)
+        self.assertEqual(compact.to_dict(), JsonSlurper.load(stream.getvalue())._value)
+        stream = io.BytesIO()
+        XmlSlurper.create(file_name='testdata/beatles.xml', lazy=True).dump(stream)
+        self.assertEqual(xml.man[0].name._value, XmlSlurper.load(stream.getvalue()).man[0].name._value)
+        for data in (b'<a/>', stream.getvalue()[:-3]):
+            with self.assertRaises(ValueError):
+                XmlSlurper.load(data)
+        with self.assertRaises(TypeError):
+            XmlSlurper.load('<a/>')
+
+
+class TestWorkers(unittest.TestCase):
+
+    def test_xml_workers(self):
+        data = '<root id="r" b="attr">' + ''.join('<a>{0}</a><b><c-d>{0}</c-d></b>'.format(i) for i in range(20)) + \
+               '<e>single</e><f.g/></root>'
+        for options in [{}, {'illegal_chars_action': Constants.IGNORE_NAMES}, {'types': 'auto', 'compact': True}]:
+            self.assertEqual(XmlSlurper.create(data, **options)._value,
+                             XmlSlurper.create(data, workers=3, **options)._value)
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', workers=2)
+        self.assertEqual(['Lennon', 'McCartney', 'Starr', 'Harrison'], xml.select('man.surname'))
+        self.assertEqual('single', XmlSlurper.create('<a><b>single</b></a>', workers=2).b)
+        with self.assertRaises(ValueError):
+            XmlSlurper.create(data, lazy=True, workers=2)
+
+    def test_json_workers(self):
+        for data in ['[{"a-b": 1}, {"a-b": 2}, {"c": [3]}]', '{"x": 1, "items": [{"a-b": 1}, {"a-b": 2}, 3], "y": [1]}',
+                     '{"a.b": [1, 2, 3], "a-b": [4, 5, 6]}', '{"a": 1}', '"text"']:
+            self.assertEqual(JsonSlurper.create(data)._value, JsonSlurper.create(data, workers=2)._value)
+        json = JsonSlurper.create(file_name='testdata/baez.json', workers=2)
+        self.assertEqual(14, json.albums[4].number_of_tracks)
+
+
+class TestSlurpCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SlurpCache(os.path.join(self.directory, 'cache'))
+        self.file_name = os.path.join(self.directory, 'test.json')
+        with open(self.file_name, 'w') as f:
+            f.write('{"name-first": "Joan"}')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hits_and_misses(self):
+        json = JsonSlurper.create(file_name=self.file_name, cache=self.cache)
+        self.assertEqual('Joan', json.name_first)
+        json = JsonSlurper.create(file_name=self.file_name, cache=self.cache)
+        self.assertEqual('Joan', json.name_first)
+        json = JsonSlurper.create(file_name=self.file_name, cache=self.cache,
+                                  illegal_chars_action=Constants.STRIP_CAPITALIZE)
+        self.assertEqual('Joan', json.nameFirst)
+        self.assertEqual({'hits': 1, 'misses': 2, 'entries': 2}, {key: self.cache.stats()[key]
+                                                                   for key in ('hits', 'misses', 'entries')})
+
+    def test_file_changes(self):
+        JsonSlurper.create(file_name=self.file_name, cache=self.cache)
+        os.utime(self.file_name, ns=(0, 0))
+        self.assertEqual('Joan', JsonSlurper.create(file_name=self.file_name, cache=self.cache).name_first)
+        self.assertEqual(1, self.cache.hits)
+        with open(self.file_name, 'w') as f:
+            f.write('{"name-first": "Bob"}')
+        os.utime(self.file_name, ns=(0, 0))
+        self.assertEqual('Bob', JsonSlurper.create(file_name=self.file_name, cache=self.cache).name_first)
+        self.assertEqual(2, self.cache.misses)
+
+    def test_invalidate_and_evict(self):
+        XmlSlurper.create(file_name='testdata/beatles.xml', cache=self.cache)
+        JsonSlurper.create(file_name=self.file_name, cache=self.cache)
+        self.assertEqual(2, self.cache.stats()['entries'])
+        self.cache.invalidate(self.file_name)
+        self.assertEqual(1, self.cache.stats()['entries'])
+        self.cache.invalidate()
+        self.assertEqual(0, self.cache.stats()['entries'])
+        small = SlurpCache(os.path.join(self.directory, 'small'), max_size=1)
+        XmlSlurper.create(file_name='testdata/beatles.xml', cache=small)
+        self.assertEqual(0, small.stats()['entries'])
+
+    def test_lambda_not_cached(self):
+        xml = XmlSlurper.create(file_name='testdata/beatles.xml', cache=self.cache, name_func=lambda x: x.upper(),
+                                illegal_chars_action=Constants.USE_NAME_FUNCTION)
+        self.assertEqual(4, len(xml.MAN))
+        self.assertEqual(0, self.cache.stats()['entries'])
+
+
 if __name__ == "__main__":
     unittest.main()
+
+
+class TestSlurpIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ('beatles.xml', 'baez.json'):
+            shutil.copy(os.path.join('testdata', name), self.directory)
+        self.xml_file = os.path.join(self.directory, 'beatles.xml')
+        self.json_file = os.path.join(self.directory, 'baez.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_xml_lookup(self):
+        index = XmlSlurper.build_index(self.xml_file, 'surname', 'beatles/man')
+        self.assertEqual(4, len(index))
+        self.assertTrue(os.path.exists(self.xml_file + '.slx'))
+        man = XmlSlurper.lookup(self.xml_file, None, 'McCartney')
+        self.assertEqual('Paul', man.name[1])
+        self.assertEqual('1942', man.born.year)
+        self.assertEqual(1940, XmlSlurper.lookup(self.xml_file, index, 'Starr', types={'born.year': int}).born.year)
+        with self.assertRaises(KeyError):
+            XmlSlurper.lookup(self.xml_file, index, 'Best')
+        index = XmlSlurper.build_index(self.xml_file, 'born/year', index_file=os.path.join(self.directory, 'y.slx'))
+        self.assertEqual('Lennon', XmlSlurper.lookup(self.xml_file, index.index_file, 1940).surname)
+
+    def test_xml_namespaces_and_attributes(self):
+        file_name = os.path.join(self.directory, 'ns.xml')
+        with open(file_name, 'w', encoding='cp1251') as f:
+            f.write('<?xml version="1.0" encoding="windows-1251"?>\n<a:root xmlns:a="urn:a">'
+                    '<a:item id="1"><a:name>Балалайка</a:name></a:item><a:item id="2"><a:name/></a:item></a:root>')
+        index = XmlSlurper.build_index(file_name, 'id')
+        self.assertEqual('Балалайка', XmlSlurper.lookup(file_name, index, 1).name)
+        self.assertEqual({'name': None, 'id': '2'}, XmlSlurper.lookup(file_name, index, 2)._value)
+
+    def test_json_lookup(self):
+        index = JsonSlurper.build_index(self.json_file, 'name', 'albums')
+        self.assertEqual(1964, JsonSlurper.lookup(self.json_file, index, 'Joan Baez/5').year)
+        file_name = os.path.join(self.directory, 'events.jsonl')
+        with open(file_name, 'w') as f:
+            f.write('{"id": 1, "user": {"id": "a"}}\n\n{"id": 2, "user": {"id": "b"}}\n')
+        JsonSlurper.build_index(file_name, 'user/id', lines=True)
+        self.assertEqual(2, JsonSlurper.lookup(file_name, None, 'b').id)
+        file_name = os.path.join(self.directory, 'array.json')
+        with open(file_name, 'w') as f:
+            f.write('[{"k": "x,]"}, 1, "s", [2], {"k": "y\\"", "v": {"k": "z"}}]')
+        index = JsonSlurper.build_index(file_name, 'k')
+        self.assertEqual(['x,]', 'y"'], list(index.keys()))
+        self.assertEqual('z', JsonSlurper.lookup(file_name, index, 'y"').v.k)
+        with self.assertRaises(ValueError):
+            XmlSlurper.lookup(file_name, index, 'x,]')
+
+    def test_stale_index(self):
+        index = XmlSlurper.build_index(self.xml_file, 'surname', 'beatles/man')
+        with open(self.xml_file, 'w') as f:
+            f.write('<beatles><man><surname>Best</surname><name>Pete</name></man></beatles>')
+        self.assertTrue(index.is_stale())
+        self.assertEqual('Pete', XmlSlurper.lookup(self.xml_file, None, 'Best').name)
+        self.assertEqual(['Best'], list(SlurpIndex.load(self.xml_file + '.slx').keys()))
+        with self.assertRaises(KeyError):
+            XmlSlurper.lookup(self.xml_file, index, 'Lennon')
+
+    def test_command_line(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            slurpers.main(['index', self.json_file, '--key', 'year', '--path', 'albums'])
+            slurpers.main(['lookup', self.json_file, '1961'])
+        self.assertEqual('Joan Baez, Vol. 2', json.loads(out.getvalue().splitlines()[-1])['name'])
+
+
+class TestCommandLine(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def select(self, *argv):
+        with contextlib.redirect_stdout(io.StringIO()) as out, contextlib.redirect_stderr(io.StringIO()) as err:
+            try:
+                slurpers.main(['select'] + list(argv))
+                status = 0
+            except SystemExit as e:
+                status = e.code
+        return [json.loads(line) for line in out.getvalue().splitlines()], err.getvalue(), status
+
+    def test_select_files(self):
+        values, _, status = self.select('man.name', 'testdata/beatles.xml')
+        self.assertEqual(0, status)
+        self.assertEqual(['John', 'Winston', 'James', 'Paul', 'Ringo', 'George'], values)
+        values, _, _ = self.select('albums[name=Joan Baez].year', 'testdata/baez.json')
+        self.assertEqual([1960], values)
+        file_name = os.path.join(self.directory, 'google')
+        shutil.copy('testdata/google.config', file_name)
+        values, _, _ = self.select('Database.port', file_name, '--with-filename')
+        self.assertEqual([{'file': file_name, 'value': '1234'}], values)
+
+    def test_select_lines_and_errors(self):
+        file_name = os.path.join(self.directory, 'events.jsonl')
+        with open(file_name, 'w') as f:
+            f.write('{"id": 1, "user": {"user-id": "a"}}\n\n{"id": 2, "user": {"user-id": "b"}}\n')
+        values, err, status = self.select('user.user_id', file_name, 'missing.xml', 'testdata/beatles.xml',
+                                          '--kind', 'json')
+        self.assertEqual(['a', 'b'], values)
+        self.assertIn('missing.xml', err)
+        self.assertEqual(1, status)
+
+    def test_select_stdin(self):
+        stdin = sys.stdin
+        self.addCleanup(setattr, sys, 'stdin', stdin)
+        for data, argv, expected in [(b'{"a": "\xe9"}', ['a', '--charset', 'latin-1'], ['\xe9']),
+                                     (b'[Section]\na: 1\n', ['Section.a'], ['1']),
+                                     (b'<x><a>1</a><a>2</a></x>', ['a', '-'], ['1', '2']),
+                                     (b'{"a": 1}\n{"a": 2}\n', ['--lines', 'a'], [1, 2])]:
+            sys.stdin = io.TextIOWrapper(io.BytesIO(data))
+            values, _, status = self.select(*argv)
+            self.assertEqual(expected, values)
+            self.assertEqual(0, status)
+
+    def test_select_jobs(self):
+        file_names = ['testdata/beatles.xml', 'testdata/baez.json', 'missing.json'] * 3
+        values, err, status = self.select('..surname', '--jobs', '2', *file_names[:4], '--with-filename',
+                                          *file_names[4:])
+        expected, _, _ = self.select('..surname', *file_names, '--with-filename')
+        self.assertEqual(expected, values)
+        self.assertEqual(['Baez'] * 3, [v['value'] for v in values if v['file'].endswith('.json')])
+        self.assertEqual(3, len(err.splitlines()))
+        self.assertEqual(1, status)